@@ -0,0 +1,67 @@
+from camelup.bulk import analyze_file
+from camelup.sampling import SamplingConfig
+from camelup.store import open_store
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyze a JSON Lines file of saved Camel Up games"
+    )
+    parser.add_argument("input", type=str, help="One Game.to_json state per line")
+    parser.add_argument("output", type=str, help="File to write one result per line to")
+    parser.add_argument(
+        "--player", type=int, help="Player to rank moves for", default=0
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Worker processes to analyze states with, 0 to use this process only",
+        default=0,
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        help="States read, evaluated and checkpointed at a time",
+        default=1000,
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        help="Estimate each leg from at most this many sampled rounds instead of all of them",
+        default=0,
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last checkpoint of output",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Don't keep leg results on disk across sessions",
+    )
+    args = parser.parse_args()
+
+    if not args.no_store:
+        open_store()
+    sampling = SamplingConfig(budget=args.samples) if args.samples > 0 else None
+    log = lambda stats: print(
+        f"{stats.states} states, {stats.unique} legs evaluated, {stats.errors} errors, "
+        f"{stats.states_per_s:.1f} states/s"
+    )
+    stats = analyze_file(
+        args.input,
+        args.output,
+        args.player,
+        args.processes,
+        args.window,
+        sampling,
+        args.resume,
+        log,
+    )
+    print(f"Done in {stats.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from camelup.benchmark import compare, run_suite
+import argparse
+import json
+import sys
+
+
+def report(regressions: list) -> int:
+    for name, metric, old, new in regressions:
+        print(
+            f"REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} ({new / old - 1:+.0%})"
+        )
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camel Up benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser(
+        "run", help="Measure every case and write the results as JSON"
+    )
+    run.add_argument(
+        "--output", type=str, help="File to write results to", default="benchmark.json"
+    )
+    run.add_argument(
+        "--repeat", type=int, help="Runs of each case, the median is kept", default=3
+    )
+    run.add_argument(
+        "--filter", type=str, help="Only run cases whose name contains this", default=""
+    )
+    run.add_argument(
+        "--baseline",
+        type=str,
+        help="Results file to compare against when done",
+        default=None,
+    )
+    run.add_argument(
+        "--threshold",
+        type=float,
+        help="Slowdown that counts as a regression",
+        default=0.1,
+    )
+
+    cmp = commands.add_parser(
+        "compare", help="Flag cases that regressed between two results files"
+    )
+    cmp.add_argument("baseline", type=str)
+    cmp.add_argument("current", type=str)
+    cmp.add_argument(
+        "--threshold",
+        type=float,
+        help="Slowdown that counts as a regression",
+        default=0.1,
+    )
+    args = parser.parse_args()
+
+    if args.command == "run":
+        log = lambda name, case: print(
+            f"{name}: {case['wall_s']:.3f}s, {case['throughput']:.1f} {case['unit']}, {case['peak_rss_mb']:.0f} MB"
+        )
+        results = run_suite(args.repeat, args.filter, log)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        if args.baseline is None:
+            return 0
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        current = results
+    else:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        with open(args.current, "r") as f:
+            current = json.load(f)
+    return report(compare(baseline, current, args.threshold))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
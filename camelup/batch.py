@@ -0,0 +1,147 @@
+import numpy as np
+
+from camelup.constants import *
+from camelup.packed import PackedBoard
+from camelup.rounds import encode_rounds
+
+
+def step_batch(
+    tile: np.ndarray,
+    height: np.ndarray,
+    count: np.ndarray,
+    color: np.ndarray,
+    spaces: np.ndarray,
+    boost_pos: np.ndarray,
+    boost_neg: np.ndarray,
+) -> tuple:
+    """
+    Move the rolled camel on many boards at once.
+    tile and height are (n, N_CAMELS), count is (n, MAX_TILE + 1) and is updated in place, color and spaces are (n,).
+    Returns (tile, height, landing, on_board, n_moved, new_tile), landing being the tile before any booster.
+    """
+    # Flat offsets into each board's row of camels and of tiles
+    camel_row = np.arange(len(tile)) * N_CAMELS
+    count_row = np.arange(len(tile)) * count.shape[1]
+    t_flat, h_flat, c_flat = tile.ravel(), height.ravel(), count.ravel()
+
+    # If crazy camel rolled, and only one has toppers, move the one with toppers
+    crazy = (color == BLACK) | (color == WHITE)
+    black_top = (tile[:, BLACK] != EMPTY) & (
+        height[:, BLACK] < c_flat[count_row + tile[:, BLACK]] - 1
+    )
+    white_top = (tile[:, WHITE] != EMPTY) & (
+        height[:, WHITE] < c_flat[count_row + tile[:, WHITE]] - 1
+    )
+    color = np.where(
+        crazy & (black_top ^ white_top), np.where(black_top, BLACK, WHITE), color
+    )
+    spaces = np.where(crazy, -spaces, spaces)
+
+    my_tile = t_flat[camel_row + color]
+    if np.any(my_tile == EMPTY):
+        raise ValueError("Rolled a camel that is not on the board")
+    my_height = h_flat[camel_row + color]
+    landing = my_tile + spaces
+
+    # Boosters, only before the finish line
+    on_board = landing < N_TILES
+    wrapped = np.mod(landing, N_TILES)
+    neg = on_board & boost_neg[wrapped]
+    pos = on_board & ~neg & boost_pos[wrapped]
+    boost = np.where(crazy, -1, 1)
+    new_tile = np.where(on_board, wrapped, landing)
+    new_tile += np.where(neg, -boost, np.where(pos, boost, 0)).astype(np.int8)
+    if np.any(new_tile < 0):
+        raise ValueError("Camel was boosted off the start of the board")
+    on_top = ~neg
+
+    # Move the stack, going under the camels already there on a -1 booster
+    n_moved = c_flat[count_row + my_tile] - my_height
+    movers = (tile == my_tile[:, None]) & (height >= my_height[:, None])
+    under = (tile == new_tile[:, None]) & ~movers & ~on_top[:, None]
+    base = np.where(on_top, c_flat[count_row + new_tile], 0) - my_height
+    height = (
+        height
+        + np.where(movers, base[:, None], 0)
+        + np.where(under, n_moved[:, None], 0)
+    )
+    tile = np.where(movers, new_tile[:, None], tile)
+    c_flat[count_row + my_tile] -= n_moved
+    c_flat[count_row + new_tile] += n_moved
+    return tile, height, wrapped, on_board, n_moved, new_tile
+
+
+def ranking(tile: np.ndarray, height: np.ndarray) -> np.ndarray:
+    """WIN_CAMELS of each board from first to last, camels not on the board come last"""
+    racers = tile[:, WIN_CAMELS].astype(np.int32)
+    # Highest (tile, height) wins
+    key = np.where(
+        racers == EMPTY, -1, racers * N_CAMELS + height[:, WIN_CAMELS].astype(np.int32)
+    )
+    return np.array(WIN_CAMELS)[np.argsort(-key, axis=1)]
+
+
+def simulate_batch(board: PackedBoard, rounds: np.ndarray) -> tuple:
+    """
+    Simulate many rounds from the same board at once, one die step at a time across all rounds.
+    rounds is an (n_rounds, n_steps, 2) array of (camel, roll).
+    Returns per round (first, second, landings, game_over), landings is (n_rounds, N_TILES).
+    """
+    n_rounds, n_steps = rounds.shape[0], rounds.shape[1]
+    tile = np.tile(np.array(board.tile, dtype=np.int8), (n_rounds, 1))
+    height = np.tile(np.array(board.height, dtype=np.int8), (n_rounds, 1))
+    count = np.tile(np.array(board.count, dtype=np.int8), (n_rounds, 1))
+    boost_pos, boost_neg = board_boosters(board)
+    landings = np.zeros((n_rounds, N_TILES), dtype=np.int16)
+    game_over = np.zeros(n_rounds, dtype=bool)
+
+    for step in range(n_steps):
+        # Rounds that already crossed the finish line are frozen
+        if game_over.any():
+            rows = np.flatnonzero(~game_over)
+            t, h, c = tile[rows], height[rows], count[rows]
+        else:
+            rows = slice(None)
+            t, h, c = tile, height, count
+        if len(t) == 0:
+            break
+        t, h, wrapped, on_board, n_moved, new_tile = step_batch(
+            t, h, c, rounds[rows, step, 0], rounds[rows, step, 1], boost_pos, boost_neg
+        )
+        tile[rows], height[rows], count[rows] = t, h, c
+
+        # Landings before booster, you dont get wraparound points
+        landing_rows = np.arange(n_rounds)[rows]
+        landings[landing_rows[on_board], wrapped[on_board]] += n_moved[on_board]
+        game_over[rows] = new_tile >= N_TILES
+
+    order = ranking(tile, height)
+    return order[:, 0], order[:, 1], landings, game_over
+
+
+def board_boosters(board: PackedBoard) -> tuple:
+    """(boost_pos, boost_neg) of the board as N_TILES bool arrays"""
+    boost_pos = np.array([board.boost_pos >> i & 1 for i in range(N_TILES)], dtype=bool)
+    boost_neg = np.array([board.boost_neg >> i & 1 for i in range(N_TILES)], dtype=bool)
+    return boost_pos, boost_neg
+
+
+def batch_leg(dice: tuple, board: tuple) -> tuple:
+    """
+    Count first place, second place and landings over every round of the leg, all rounds at once.
+    Returns (first, second, landings, total) like enumerate_leg, raises ValueError if the board can't be packed.
+    """
+    rounds = encode_rounds(dice)
+    first, second, landings, _ = simulate_batch(PackedBoard.from_tuple(board), rounds)
+    return (
+        np.bincount(first, minlength=len(WIN_CAMELS)),
+        np.bincount(second, minlength=len(WIN_CAMELS)),
+        landings.sum(axis=0, dtype=int),
+        len(rounds),
+    )
+
+
+def batch_win_probabilities(dice: tuple, board: tuple):
+    """Same result as win_probabilities, simulating every round of the leg with array operations"""
+    first, second, landings, total = batch_leg(dice, board)
+    return first / total, second / total, landings / total
@@ -0,0 +1,206 @@
+import contextlib
+import io
+import multiprocessing
+import platform
+import resource
+import statistics
+import time
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import Board, simulate_round
+from camelup.cache import caches
+from camelup.engine import n_leaves
+from camelup.game import Game, get_rounds, win_probabilities
+from camelup.rounds import load_table
+
+# Bump when cases, boards or metrics change, results are only compared within a version
+BENCHMARK_VERSION = 2
+
+# Fixed boards every run is measured on
+BOARDS = {
+    # default_setup.json
+    "opening": {PURPLE: 2, RED: 2, BLUE: 2, YELLOW: 3, GREEN: 3, WHITE: 16, BLACK: 14},
+    "clustered": {
+        RED: 5,
+        YELLOW: 5,
+        BLUE: 5,
+        GREEN: 6,
+        PURPLE: 6,
+        WHITE: 9,
+        BLACK: 9,
+    },
+    "near_finish": {
+        RED: 12,
+        YELLOW: 13,
+        BLUE: 13,
+        GREEN: 14,
+        PURPLE: 15,
+        WHITE: 16,
+        BLACK: 11,
+    },
+    "boosters": {
+        RED: 1,
+        YELLOW: 1,
+        BLUE: 2,
+        GREEN: 3,
+        PURPLE: 3,
+        WHITE: 15,
+        BLACK: 16,
+        BOOST_POS: [5, 9],
+        BOOST_NEG: [7, 12],
+    },
+}
+
+# Dice left for a leg with n dice, always the same ones
+LEG_DICE = {n: tuple(DICE[-n:]) for n in range(1, N_DICE + 1)}
+
+
+def _game(board: str, n_dice: int) -> Game:
+    g = Game(2, BOARDS[board])
+    g.dice = list(LEG_DICE[n_dice])
+    # Player 0 holds a bet so boosters change the value of something
+    g.bet(0, RED)
+    return g
+
+
+def _get_rounds():
+    get_rounds(LEG_DICE[N_DICE])
+    return n_leaves(LEG_DICE[N_DICE])
+
+
+def _simulate_round(board: str, n: int = 20000):
+    rng = np.random.default_rng(0)
+    rounds = get_rounds(LEG_DICE[N_DICE])
+    tiles = Board(BOARDS[board]).to_tuple()
+    for i in rng.integers(0, len(rounds), n):
+        simulate_round(Board.from_tuple(tiles).tiles, rounds[i])
+    return n
+
+
+def _win_probabilities(board: str, n_dice: int):
+    win_probabilities(LEG_DICE[n_dice], Board(BOARDS[board]).to_tuple())
+    return n_leaves(LEG_DICE[n_dice])
+
+
+def _best_booster_bet(board: str, n_dice: int):
+    g = _game(board, n_dice)
+    _, _, landings = g.probabilities(g.board.to_tuple())
+    g.best_booster_bet(0, landings)
+    return 1
+
+
+def _optimal_move(board: str, n_dice: int):
+    g = _game(board, n_dice)
+    g.optimal_move(0)
+    return 1
+
+
+def cases() -> dict:
+    """name -> (function, args, unit). The function returns how many units it got through"""
+    res = {"get_rounds": (_get_rounds, (), "rounds/s")}
+    for board in BOARDS:
+        res[f"simulate_round/{board}"] = (_simulate_round, (board,), "rounds/s")
+        for n_dice in [6, 4, 2]:
+            res[f"win_probabilities/{n_dice} dice/{board}"] = (
+                _win_probabilities,
+                (board, n_dice),
+                "rounds/s",
+            )
+        res[f"best_booster_bet/{board}"] = (_best_booster_bet, (board, 6), "calls/s")
+        res[f"optimal_move/{board}"] = (_optimal_move, (board, 6), "calls/s")
+    return res
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB"""
+    try:
+        # Unlike ru_maxrss, VmHWM starts over when a process execs
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(func, args, conn):
+    # Start cold, but don't time building the shared round table
+    load_table()
+    for cache in caches().values():
+        cache.clear()
+    # optimal_move prints its ranking
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        n = func(*args)
+        wall = time.perf_counter() - start
+    conn.send((wall, n, peak_rss_mb()))
+    conn.close()
+
+
+def run_case(func, args) -> tuple:
+    """
+    Run func(*args) once in a fresh process. Returns (wall seconds, units done, peak RSS in MB).
+    The process is spawned rather than forked, so its peak holds none of this process's pages.
+    """
+    context = multiprocessing.get_context("spawn")
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(func, args, child))
+    process.start()
+    child.close()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def run_suite(repeat: int = 3, pattern: str = "", log=None) -> dict:
+    """
+    Measure every case whose name contains pattern, repeat times each, cold caches every time.
+    Returns a JSON-ready dict. log(name, case) is called after each case.
+    """
+    res = {
+        "version": BENCHMARK_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "cases": {},
+    }
+    for name, (func, args, unit) in cases().items():
+        if pattern not in name:
+            continue
+        runs = [run_case(func, args) for _ in range(repeat)]
+        wall = statistics.median(r[0] for r in runs)
+        case = {
+            "wall_s": wall,
+            "runs_s": [r[0] for r in runs],
+            "throughput": runs[0][1] / wall,
+            "unit": unit,
+            "peak_rss_mb": max(r[2] for r in runs),
+        }
+        res["cases"][name] = case
+        if log is not None:
+            log(name, case)
+    return res
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """
+    Cases that got slower or bigger than baseline by more than threshold, as
+    (name, metric, baseline value, current value). Cases missing from either side are skipped.
+    """
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(
+            f"Benchmark version {current.get('version')} can't be compared to {baseline.get('version')}"
+        )
+    res = []
+    for name, case in current["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            continue
+        for metric in ["wall_s", "peak_rss_mb"]:
+            if case[metric] > old[metric] * (1 + threshold):
+                res.append((name, metric, old[metric], case[metric]))
+    return res
@@ -1,4 +1,6 @@
 from camelup.constants import *
+from camelup.instrument import timed
+from typing import NamedTuple
 import numpy as np
 
 
@@ -62,6 +64,10 @@ class Board:
             board.tiles[i] = list(l)
         return board
 
+    def overlay(self):
+        """Immutable what-if view of the board as it is now"""
+        return BoardOverlay(self.to_tuple())
+
     def reset_round(self):
         # Remove boosters
         for l in self.tiles.values():
@@ -162,6 +168,61 @@ class Board:
         return [x for x in range(N_TILES) if x not in occupied]
 
 
+class BoardOverlay(NamedTuple):
+    """
+    Immutable board, held as its Board.to_tuple() key.
+    Adding or removing a booster only swaps that tile in the key, so what-if boards cost no copies
+    and can be handed to other threads and processes as they are.
+    """
+
+    key: tuple
+
+    def to_tuple(self) -> tuple:
+        return self.key
+
+    def to_board(self) -> Board:
+        return Board.from_tuple(self.key)
+
+    def _with_tile(self, location: int, l: tuple):
+        assert self.key[location][0] == location
+        return BoardOverlay(
+            self.key[:location] + ((location, l),) + self.key[location + 1 :]
+        )
+
+    def with_booster(self, location: int, booster: int):
+        """This board plus a booster at location, same key as Board.add_booster"""
+        return self._with_tile(location, self.key[location][1] + (booster,))
+
+    def without_booster(self, location: int):
+        """This board minus the booster at location, same key as Board.remove_booster"""
+        l = self.key[location][1]
+        booster = self.booster_at(location)
+        if booster is None:
+            return self
+        i = l.index(booster)
+        return self._with_tile(location, l[:i] + l[i + 1 :])
+
+    def booster_at(self, location: int):
+        """BOOST_POS or BOOST_NEG at location, None if there is none"""
+        l = self.key[location][1]
+        if BOOST_POS in l:
+            return BOOST_POS
+        if BOOST_NEG in l:
+            return BOOST_NEG
+        return None
+
+    def booster_tiles(self) -> list:
+        return [tile for tile, l in self.key if BOOST_POS in l or BOOST_NEG in l]
+
+    def available_booster_locations(self) -> list:
+        """Same as Board.available_booster_locations"""
+        occupied = set()
+        for tile in self.booster_tiles():
+            occupied |= {tile - 1, tile, tile + 1}
+        return [x for x in range(N_TILES) if x not in occupied and not self.key[x][1]]
+
+
+@timed("simulate_round")
 def simulate_round(tiles: dict, round: list):
     """
     Simulate moving the camels according to rounds, which is a list of (color, spaces)
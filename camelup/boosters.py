@@ -0,0 +1,174 @@
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import BoardOverlay
+from camelup.dp import CHUNK, _step
+from camelup.engine import n_leaves
+from camelup.instrument import count
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+
+
+def _step_watched(
+    states: dict, first: list, second: list, landings: list, watch: dict, check=None
+) -> dict:
+    """
+    _step over lane packed weights, lane 0 counting every round and lane j + 1 the rounds yet to land on
+    the j-th watched tile. A roll landing on a watched tile takes the rounds out of that tile's lane, and
+    watch[tile] = (shift, keep, mask, frontier) records (state, color, spaces, rest, weight) into
+    frontier[len(rest)] for the boosted leg to go on from.
+    """
+    next_states = {}
+    for n, ((_, remaining), (state, weight)) in enumerate(states.items()):
+        if check is not None and n % CHUNK == 0:
+            check()
+        if len(remaining) <= 1:
+            a, b = state.leaders()
+            first[a] += weight
+            second[b] += weight
+            continue
+        for i, die in enumerate(remaining):
+            rest = remaining[:i] + remaining[i + 1 :]
+            below = n_leaves(rest)
+            colors = [BLACK, WHITE] if die == GREY else [die]
+            for spaces in range(1, 4):
+                for color in colors:
+                    record, landing, n_moved, game_over = state.move(color, spaces)
+                    w = weight
+                    if landing < N_TILES:
+                        # The landing itself counts the same with a booster on the tile
+                        landings[landing] += weight * n_moved * below
+                        watched = watch.get(landing % N_TILES)
+                        if watched is not None:
+                            shift, keep, mask, frontier = watched
+                            lane_weight = weight >> shift & mask
+                            if lane_weight:
+                                # state is back before the roll once this step is done with it
+                                frontier.setdefault(len(rest), []).append(
+                                    (state, color, spaces, rest, lane_weight)
+                                )
+                                w = weight & keep
+                    if game_over or len(rest) <= 1:
+                        a, b = state.leaders()
+                        first[a] += w * below
+                        second[b] += w * below
+                    else:
+                        key = (state.layout(), rest)
+                        if key in next_states:
+                            next_states[key][1] += w
+                        else:
+                            next_states[key] = [state.copy(), w]
+                    state.undo(record)
+    return next_states
+
+
+def _boosted(
+    frontier: dict, size: int, location: int, booster: int, check=None
+) -> tuple:
+    """
+    Counts of the rounds from their first landing on location on, with booster there.
+    frontier is filled by _step_watched. Rounds that land at different depths merge once they have
+    as many dice left.
+    """
+    first = [0] * len(WIN_CAMELS)
+    second = [0] * len(WIN_CAMELS)
+    landings = [0] * N_TILES
+    bit = 1 << location
+    states = {}
+    for n in range(size - 1, 0, -1):
+        states = _step(states, first, second, landings, check)
+        for state, color, spaces, rest, weight in frontier.get(n, []):
+            if booster == BOOST_POS:
+                state.boost_pos |= bit
+            else:
+                state.boost_neg |= bit
+            record, _, _, game_over = state.move(color, spaces)
+            if game_over or n <= 1:
+                a, b = state.leaders()
+                first[a] += weight * n_leaves(rest)
+                second[b] += weight * n_leaves(rest)
+            else:
+                key = (state.layout(), rest)
+                if key in states:
+                    states[key][1] += weight
+                else:
+                    states[key] = [state.copy(), weight]
+            # Put the frontier state back for the other boosters
+            state.undo(record)
+            state.boost_pos &= ~bit
+            state.boost_neg &= ~bit
+    return first, second, landings
+
+
+def booster_legs(dice: tuple, board: tuple, locations: list) -> tuple:
+    """
+    Count the leg on board, and on board with a booster of either type on each of locations.
+    A booster only changes rounds from their first landing on its tile, so the leg is counted once
+    with dp_leg's merged states, keeping apart the rounds yet to land on each location, and each booster
+    goes on from the states that first land on its tile.
+    Returns (base, {(location, booster): (board, counts)}), counts being (first, second, landings, total)
+    like enumerate_leg. Raises ValueError if a board can't be packed.
+    """
+    start = PackedBoard.from_tuple(board)
+    overlay = BoardOverlay(board)
+    boards = {
+        (location, booster): overlay.with_booster(location, booster).to_tuple()
+        for location in locations
+        for booster in [BOOST_POS, BOOST_NEG]
+    }
+    # Boosters next to another can't be packed, find out before counting anything
+    for new_board in boards.values():
+        PackedBoard.from_tuple(new_board)
+    total = n_leaves(dice)
+    progress = active_progress()
+    check = None if progress is None else progress.check
+    # Lane 0 counts every round, lane j + 1 the rounds yet to land on locations[j]
+    lane = (total * N_DICE * len(CAMELS)).bit_length()
+    mask = (1 << lane) - 1
+    watch = {}
+    for j, location in enumerate(locations):
+        shift = lane * (j + 1)
+        watch[location] = (shift, ~(mask << shift), mask, {})
+    packed = [[0] * len(WIN_CAMELS), [0] * len(WIN_CAMELS), [0] * N_TILES]
+    states = {
+        (start.layout(), tuple(dice)): [
+            start,
+            sum(1 << (lane * j) for j in range(len(locations) + 1)),
+        ]
+    }
+    while states:
+        states = _step_watched(states, *packed, watch, check)
+    base = tuple(np.array([x & mask for x in c], dtype=int) for c in packed) + (total,)
+    count("rounds", total)
+    # Rounds counted again for each booster
+    touched = {
+        location: sum(
+            weight * n_leaves(rest)
+            for entries in watch[location][3].values()
+            for _, _, _, rest, weight in entries
+        )
+        for location in locations
+    }
+    work = total + 2 * sum(touched.values())
+    done = total
+    res = {}
+    for location in locations:
+        if progress is not None:
+            progress.update(done, work)
+        shift, _, _, frontier = watch[location]
+        untouched = [[x >> shift & mask for x in c] for c in packed]
+        for booster in [BOOST_POS, BOOST_NEG]:
+            counts = _boosted(frontier, len(dice), location, booster, check)
+            count("rounds", touched[location])
+            done += touched[location]
+            res[(location, booster)] = (
+                boards[(location, booster)],
+                tuple(
+                    np.array([x + y for x, y in zip(u, c)], dtype=int)
+                    for u, c in zip(untouched, counts)
+                )
+                + (total,),
+            )
+    if progress is not None:
+        progress.update(done, work)
+    return base, res
@@ -0,0 +1,211 @@
+import json
+import multiprocessing
+import os
+import time
+from typing import NamedTuple
+import numpy as np
+
+from camelup.constants import *
+from camelup.canonical import canonical
+from camelup.game import Game, win_probabilities
+from camelup.sampling import Estimate
+
+
+class BulkStats(NamedTuple):
+    """What analyze_file got through"""
+
+    states: int
+    unique: int
+    errors: int
+    seconds: float
+
+    @property
+    def states_per_s(self) -> float:
+        return self.states / self.seconds if self.seconds > 0 else 0.0
+
+
+def state_key(g: Game) -> tuple:
+    """(dice, board) the leg of a game is evaluated on, shared by every position with the same leg results"""
+    dice, board, _ = canonical(tuple(g.dice), g.board.to_tuple())
+    return dice, board
+
+
+def analyze_state(g: Game, player_id: int = 0, estimate=None) -> dict:
+    """
+    Leg probabilities and ranked moves for player_id, as JSON-ready dict.
+    When sampling, both come from one Estimate of the leg, estimate if given.
+    """
+    board = g.board.to_tuple()
+    if estimate is None:
+        estimate = g.estimate(board, player_id)
+    ranking = g.rank_moves(player_id, estimate)
+    if estimate is None:
+        first, second, landings = win_probabilities(tuple(g.dice), board)
+    else:
+        first, second, landings = estimate.first, estimate.second, estimate.landings
+    return {
+        "first": {color_to_str(c): float(first[c]) for c in WIN_CAMELS},
+        "second": {color_to_str(c): float(second[c]) for c in WIN_CAMELS},
+        "landings": [float(x) for x in landings],
+        "exact": ranking.exact,
+        "moves": [
+            {"move": m.move, "value": float(m.value), "error": float(m.error)}
+            for m in ranking.moves
+        ],
+    }
+
+
+def _perm(g: Game) -> np.ndarray:
+    return canonical(tuple(g.dice), g.board.to_tuple())[2]
+
+
+def _recolor(estimate: Estimate, perm: np.ndarray, new_perm: np.ndarray) -> Estimate:
+    """estimate of the position canonical gave perm for, in the colors of the one it gave new_perm"""
+    fields = {}
+    for name in ["first", "second", "first_se", "second_se"]:
+        canon = np.empty_like(getattr(estimate, name))
+        canon[perm] = getattr(estimate, name)
+        fields[name] = canon[new_perm]
+    return estimate._replace(**fields)
+
+
+def _analyze_group(player_id: int, sampling, items: list) -> list:
+    """Worker side: analyze states sharing one (dice, board), the leg is evaluated once"""
+    res = []
+    estimate = None
+    if sampling is not None and len(items) > 1:
+        # Bets differ between the states, so the shared sample can't stop early for one of them
+        first = items[0][1]
+        first.sampling = sampling
+        try:
+            estimate = first.estimate(first.board.to_tuple())
+        except Exception:
+            # Reported for every state below
+            pass
+    for line, g in items:
+        g.sampling = sampling
+        try:
+            shared = None
+            if estimate is not None:
+                shared = _recolor(estimate, _perm(first), _perm(g))
+            record = analyze_state(g, player_id, shared)
+        except Exception as e:
+            record = {"error": repr(e)}
+        res.append((line, record))
+    return res
+
+
+def _parse(line: str):
+    data = json.loads(line)
+    if data["game_over"]:
+        raise ValueError("Game is over")
+    g = Game.from_json(data)
+    return g, state_key(g)
+
+
+def _write_checkpoint(path: str, checkpoint: dict):
+    # Replace atomically so a crash never leaves half a checkpoint
+    with open(path + ".tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
+
+
+def analyze_file(
+    input_path: str,
+    output_path: str,
+    player_id: int = 0,
+    processes: int = 0,
+    window: int = 1000,
+    sampling=None,
+    resume: bool = False,
+    log=None,
+) -> BulkStats:
+    """
+    Stream the Game.to_json states of a JSON Lines file and write one result per state, in input order, as JSON Lines.
+    States are read window lines at a time, so memory stays bounded. Within a window, states with the same
+    (dice, board) are evaluated together, spread over processes worker processes (0 to stay in this process).
+    After every window a checkpoint is written to output_path + ".checkpoint", resume picks up from it.
+    log(stats) is called after every window.
+    """
+    checkpoint_path = output_path + ".checkpoint"
+    checkpoint = {
+        "line": 0,
+        "offset": 0,
+        "states": 0,
+        "unique": 0,
+        "errors": 0,
+        "seconds": 0.0,
+    }
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+    pool = None
+    if processes > 0:
+        pool = multiprocessing.get_context("fork").Pool(processes)
+    # Time spent before resuming counts towards the rate
+    start = time.perf_counter() - checkpoint["seconds"]
+    stats = BulkStats(*(checkpoint[x] for x in BulkStats._fields))
+    try:
+        with open(input_path, "r") as src, open(
+            output_path, "r+" if resume and checkpoint["offset"] else "w"
+        ) as out:
+            # Drop anything written after the last checkpoint
+            out.seek(checkpoint["offset"])
+            out.truncate()
+            lines = enumerate(src)
+            for _ in range(checkpoint["line"]):
+                next(lines, None)
+            done = False
+            while not done:
+                batch = []
+                for line, text in lines:
+                    batch.append((line, text))
+                    if len(batch) == window:
+                        break
+                else:
+                    done = True
+                if not batch:
+                    break
+                records, n_unique = _analyze_window(batch, player_id, sampling, pool)
+                for line, record in records:
+                    out.write(json.dumps({"line": line, **record}) + "\n")
+                out.flush()
+                checkpoint["line"] = batch[-1][0] + 1
+                checkpoint["offset"] = out.tell()
+                checkpoint["states"] += len(records)
+                checkpoint["unique"] += n_unique
+                checkpoint["errors"] += sum("error" in r for _, r in records)
+                checkpoint["seconds"] = time.perf_counter() - start
+                _write_checkpoint(checkpoint_path, checkpoint)
+                stats = BulkStats(*(checkpoint[x] for x in BulkStats._fields))
+                if log is not None:
+                    log(stats)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return stats
+
+
+def _analyze_window(batch: list, player_id: int, sampling, pool) -> tuple:
+    """Results for a window of (line, text), in line order, and how many distinct legs it had"""
+    groups = {}
+    records = []
+    for line, text in batch:
+        if not text.strip():
+            continue
+        try:
+            g, key = _parse(text)
+        except Exception as e:
+            records.append((line, {"error": repr(e)}))
+            continue
+        groups.setdefault(key, []).append((line, g))
+    tasks = [(player_id, sampling, items) for items in groups.values()]
+    if pool is None:
+        results = [_analyze_group(*task) for task in tasks]
+    else:
+        results = pool.starmap(_analyze_group, tasks)
+    for result in results:
+        records += result
+    records.sort(key=lambda x: x[0])
+    return records, len(groups)
@@ -0,0 +1,187 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+LRU = "lru"
+LFU = "lfu"
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+
+def sizeof(obj) -> int:
+    """
+    Rough number of bytes held by obj, following tuples, lists and dicts.
+    numpy arrays count their data only if they own it, so views into memory mapped tables are cheap.
+    """
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(sizeof(x) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class BoundedCache:
+    """
+    Memo table with a byte budget.
+    Once over budget it evicts the least recently used (LRU) or least frequently used (LFU) entries.
+    """
+
+    def __init__(self, name: str, max_bytes: int, policy: str = LRU, size=sizeof):
+        assert policy in [LRU, LFU]
+        self.name = name
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.size = size
+        # key -> (value, bytes), oldest use first
+        self.entries = OrderedDict()
+        self.uses = {}
+        # use count -> keys used that often, oldest use first, so LFU never scans every entry
+        self.buckets = {}
+        # Lowest use count with keys, None once its bucket empties until the next victim is needed
+        self.min_uses = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """Cached value for key, default if missing. Counts as a hit or miss"""
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.entries.move_to_end(key)
+            uses = self.uses[key]
+            self._unbucket(key, uses)
+            self._bucket(key, uses + 1)
+            return self.entries[key][0]
+
+    def put(self, key, value):
+        """Cache value for key, evicting other entries to stay within budget"""
+        n_bytes = self.size(key) + self.size(value)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            # Never worth evicting everything else for one entry over budget
+            if n_bytes > self.max_bytes:
+                return
+            self.entries[key] = (value, n_bytes)
+            self._bucket(key, 1)
+            self.bytes += n_bytes
+            while self.bytes > self.max_bytes:
+                self._remove(self._victim())
+                self.evictions += 1
+
+    def _victim(self):
+        if self.policy == LRU:
+            return next(iter(self.entries))
+        # Least used, oldest first among ties
+        if self.min_uses is None:
+            self.min_uses = min(self.buckets)
+        return next(iter(self.buckets[self.min_uses]))
+
+    def _bucket(self, key, uses: int):
+        self.uses[key] = uses
+        self.buckets.setdefault(uses, OrderedDict())[key] = None
+        if self.min_uses is not None and uses < self.min_uses:
+            self.min_uses = uses
+
+    def _unbucket(self, key, uses: int):
+        bucket = self.buckets[uses]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[uses]
+            if self.min_uses == uses:
+                self.min_uses = None
+
+    def _remove(self, key):
+        _, n_bytes = self.entries.pop(key)
+        self._unbucket(key, self.uses.pop(key))
+        self.bytes -= n_bytes
+
+    def resize(self, max_bytes: int):
+        with self.lock:
+            self.max_bytes = max_bytes
+            while self.bytes > self.max_bytes:
+                self._remove(self._victim())
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.uses.clear()
+            self.buckets.clear()
+            self.min_uses = None
+            self.bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            self.hits,
+            self.misses,
+            self.evictions,
+            len(self.entries),
+            self.bytes,
+            self.max_bytes,
+        )
+
+
+# Every BoundedCache by name, so they can be sized and inspected in one place
+_caches = {}
+
+
+def register(cache: BoundedCache) -> BoundedCache:
+    _caches[cache.name] = cache
+    return cache
+
+
+def caches() -> dict:
+    return dict(_caches)
+
+
+def configure(name: str, max_bytes: int = None, policy: str = None):
+    """Change the budget or eviction policy of a registered cache"""
+    cache = _caches[name]
+    if policy is not None:
+        assert policy in [LRU, LFU]
+        cache.policy = policy
+    if max_bytes is not None:
+        cache.resize(max_bytes)
+
+
+def bounded_cache(name: str, max_bytes: int, policy: str = LRU):
+    """Like functools.cache, but held in a registered BoundedCache. Arguments must be hashable"""
+
+    def decorator(func):
+        cache = register(BoundedCache(name, max_bytes, policy))
+        missing = object()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            value = cache.get(args, missing)
+            if value is missing:
+                value = func(*args)
+                cache.put(args, value)
+            return value
+
+        wrapper.cache = cache
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
@@ -0,0 +1,53 @@
+import numpy as np
+
+from camelup.constants import *
+
+
+def camel_positions(board: tuple) -> dict:
+    """camel -> (tile, place in the tile's list) for every camel on the board"""
+    res = {}
+    for i, l in board:
+        for j, thing in enumerate(l):
+            if thing in CAMELS:
+                res[thing] = (i, j)
+    return res
+
+
+def reachable_tiles(dice: tuple, board: tuple) -> set:
+    """
+    Tiles a camel could land or be boosted onto before the leg ends.
+    Every roll moves a stack at most 3 tiles plus a booster, and only the crazy camels move backward.
+    """
+    n_rolls = len(dice) - 1
+    tiles = [tile for tile, _ in camel_positions(board).values()]
+    if n_rolls <= 0 or len(tiles) == 0:
+        return set()
+    hi = min(max(tiles) + 4 * n_rolls, N_TILES - 1)
+    lo = min(tiles) - 4 * n_rolls if GREY in dice else min(tiles)
+    # Crazy camels going backward past the start come back at the end
+    return {x % N_TILES for x in range(lo, hi + 1)}
+
+
+def canonical(dice: tuple, board: tuple) -> tuple:
+    """
+    Key shared by every position with the same leg results.
+    Boosters no camel can reach this leg are left out, and racing camels are renamed in board order,
+    from the back, since a leg plays out the same for any colors. Crazy camels are renamed the same way.
+    Returns (dice, board, perm), results for the key indexed by perm are the results for the position given.
+    """
+    reachable = reachable_tiles(dice, board)
+    positions = camel_positions(board)
+    # Camels off the board sort first, by color
+    missing = (-1, -1)
+    rename = {}
+    for names in [WIN_CAMELS, [WHITE, BLACK]]:
+        order = sorted(names, key=lambda c: (positions.get(c, missing), c))
+        rename.update(zip(order, names))
+    key = []
+    for i, l in board:
+        if l and l[0] in [BOOST_POS, BOOST_NEG] and len(l) == 1 and i not in reachable:
+            l = ()
+        key.append((i, tuple(rename.get(x, x) for x in l)))
+    dice = tuple(sorted((rename.get(d, d) for d in dice), key=DICE.index))
+    perm = np.array([rename[c] for c in WIN_CAMELS])
+    return dice, tuple(key), perm
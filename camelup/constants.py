@@ -18,6 +18,8 @@ WIN_CAMELS = [RED, YELLOW, BLUE, GREEN, PURPLE]
 N_CAMELS = len(CAMELS)
 DICE = [RED, YELLOW, BLUE, GREEN, PURPLE, GREY]
 N_DICE = len(DICE)
+# Payout of correct overall winner / loser bets, in the order they were placed
+OVERALL_PAYOUTS = [8, 5, 3, 2, 1]
 
 
 def str_to_color(value: str):
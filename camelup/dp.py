@@ -0,0 +1,133 @@
+from fractions import Fraction
+import numpy as np
+
+from camelup.constants import *
+from camelup.engine import n_leaves
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+
+# States rolled between checks for cancellation
+CHUNK = 1024
+
+
+def _step(states: dict, first: list, second: list, landings: list, check=None) -> dict:
+    """
+    Roll one more die in every state, adding finished rounds and landings into the counts.
+    Returns the states still in play, merged by (layout, dice left). check() is called every CHUNK states.
+    """
+    next_states = {}
+    for n, ((_, remaining), (state, weight)) in enumerate(states.items()):
+        if check is not None and n % CHUNK == 0:
+            check()
+        if len(remaining) <= 1:
+            # The last die stays in the pyramid
+            a, b = state.leaders()
+            first[a] += weight
+            second[b] += weight
+            continue
+        for i, die in enumerate(remaining):
+            rest = remaining[:i] + remaining[i + 1 :]
+            below = n_leaves(rest)
+            colors = [BLACK, WHITE] if die == GREY else [die]
+            for spaces in range(1, 4):
+                for color in colors:
+                    record, landing, n_moved, game_over = state.move(color, spaces)
+                    if landing < N_TILES:
+                        landings[landing] += weight * n_moved * below
+                    if game_over or len(rest) <= 1:
+                        # Nothing left to merge, every round below shares this result
+                        a, b = state.leaders()
+                        first[a] += weight * below
+                        second[b] += weight * below
+                    else:
+                        key = (state.layout(), rest)
+                        if key in next_states:
+                            next_states[key][1] += weight
+                        else:
+                            next_states[key] = [state.copy(), weight]
+                    state.undo(record)
+    return next_states
+
+
+def _in_play(states: dict) -> int:
+    """Rounds not yet counted, below the states still in play"""
+    return sum(weight * n_leaves(rest) for (_, rest), (_, weight) in states.items())
+
+
+def dp_leg(dice: tuple, board: tuple, children: dict = None) -> tuple:
+    """
+    Count first place, second place and landings over every round of the leg, one die at a time.
+    Rounds that reach the same camel layout with the same dice left are merged into one weighted state.
+    Returns (first, second, landings, total) like enumerate_leg, raises ValueError if the board can't be packed.
+    If children is given, the counts of the position after each first roll are added to it as
+    (dice left, board) -> (first, second, landings, total), so a recorded roll needs no new enumeration.
+    """
+    first = [0] * len(WIN_CAMELS)
+    second = [0] * len(WIN_CAMELS)
+    landings = [0] * N_TILES
+    start = PackedBoard.from_tuple(board)
+    total = n_leaves(dice)
+    progress = active_progress()
+    check = None if progress is None else progress.check
+    # (layout, dice left) -> [board, number of rounds that got here]
+    states = {(start.layout(), tuple(dice)): [start, 1]}
+    if children is None:
+        while states:
+            states = _step(states, first, second, landings, check)
+            if progress is not None:
+                progress.update(total - _in_play(states), total)
+        return (
+            np.array(first, dtype=int),
+            np.array(second, dtype=int),
+            np.array(landings, dtype=int),
+            n_leaves(dice),
+        )
+    states = _step(states, first, second, landings, check)
+    if progress is not None:
+        progress.update(total - _in_play(states), total)
+    # Weights below the first roll carry one bit field per child, so children
+    # keep their own counts while still merging states with each other
+    lane = (n_leaves(dice) * N_DICE * len(CAMELS)).bit_length()
+    weights = []
+    for j, value in enumerate(states.values()):
+        weights.append(value[1])
+        value[1] = 1 << (lane * j)
+    keys = [(rest, state.to_tuple()) for (_, rest), (state, _) in states.items()]
+    packed = [[0] * len(WIN_CAMELS), [0] * len(WIN_CAMELS), [0] * N_TILES]
+    mask = (1 << lane) - 1
+    while states:
+        states = _step(states, *packed, check)
+        if progress is not None:
+            # Rounds in play are per child too, weigh each child's by the rounds reaching it
+            in_play = _in_play(states)
+            in_play = sum(
+                w * (in_play >> (lane * j) & mask) for j, w in enumerate(weights)
+            )
+            progress.update(total - in_play, total)
+    for j, (key, weight) in enumerate(zip(keys, weights)):
+        counts = [[x >> (lane * j) & mask for x in count] for count in packed]
+        children[key] = tuple(np.array(x, dtype=int) for x in counts) + (
+            n_leaves(key[0]),
+        )
+        for total, count in zip([first, second, landings], counts):
+            for i, x in enumerate(count):
+                total[i] += weight * x
+    return (
+        np.array(first, dtype=int),
+        np.array(second, dtype=int),
+        np.array(landings, dtype=int),
+        n_leaves(dice),
+    )
+
+
+def rational_win_probabilities(dice: tuple, board: tuple) -> tuple:
+    """
+    Exact first place, second place and landing probabilities as lists of Fraction.
+    Converting them to float gives exactly what win_probabilities returns.
+    """
+    first, second, landings, total = dp_leg(dice, board)
+    return (
+        [Fraction(int(x), total) for x in first],
+        [Fraction(int(x), total) for x in second],
+        [Fraction(int(x), total) for x in landings],
+    )
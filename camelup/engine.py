@@ -0,0 +1,170 @@
+from math import factorial
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import Board, get_location, has_toppers
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+
+
+def n_leaves(dice) -> int:
+    """Number of rounds get_rounds would produce for these dice"""
+    n = len(dice)
+    if n <= 1:
+        return 1
+    rolls = 3 ** (n - 1)
+    # Every order that includes the grey die counts twice, once for black and once for white
+    if GREY in dice:
+        return rolls * (2 * factorial(n) - factorial(n - 1))
+    return rolls * factorial(n)
+
+
+class TileState:
+    """
+    Mutable dict-of-lists board that can apply a single roll and undo it.
+    Moves follow simulate_round exactly, used for boards PackedBoard can't represent.
+    """
+
+    def __init__(self, tiles: dict):
+        self.tiles = tiles
+
+    def move(self, color: int, spaces: int) -> tuple:
+        """
+        Apply a roll, return (record, landing, n_moved, game_over).
+        landing is the tile landed on before boosters, record is passed back to undo.
+        """
+        tiles = self.tiles
+        crazy = color in [BLACK, WHITE]
+        if crazy:
+            black_top = has_toppers(tiles, BLACK)
+            white_top = has_toppers(tiles, WHITE)
+            if black_top ^ white_top:
+                color = BLACK if black_top else WHITE
+            spaces = -spaces
+
+        my_tile, my_stack_index = get_location(tiles, color)
+        landing = my_tile + spaces
+        new_tile = landing
+        on_top = True
+        if new_tile < N_TILES:
+            new_tile %= N_TILES
+            if BOOST_NEG in tiles[new_tile]:
+                on_top = False
+                new_tile += 1 if crazy else -1
+            elif BOOST_POS in tiles[new_tile]:
+                new_tile += -1 if crazy else 1
+
+        # Past the finish line, remember what was there so undo can put it back
+        cleared = None
+        game_over = new_tile >= N_TILES
+        if game_over:
+            cleared = [(i, tiles.get(i)) for i in range(N_TILES, new_tile + 1)]
+            for i in range(N_TILES, new_tile + 1):
+                tiles[i] = []
+
+        src = tiles[my_tile]
+        stack = src[my_stack_index:]
+        del src[my_stack_index:]
+        dst = tiles[new_tile]
+        if on_top:
+            dst.extend(stack)
+        else:
+            dst[0:0] = stack
+        record = (my_tile, new_tile, len(stack), on_top, cleared)
+        return record, landing, len(stack), game_over
+
+    def undo(self, record: tuple):
+        """Undo the move that produced record"""
+        my_tile, new_tile, n_moved, on_top, cleared = record
+        dst = self.tiles[new_tile]
+        if on_top:
+            stack = dst[len(dst) - n_moved :]
+            del dst[len(dst) - n_moved :]
+        else:
+            stack = dst[:n_moved]
+            del dst[:n_moved]
+        self.tiles[my_tile].extend(stack)
+        if cleared is not None:
+            for i, l in cleared:
+                if l is None:
+                    del self.tiles[i]
+                else:
+                    self.tiles[i] = l
+
+    def leaders(self) -> tuple:
+        """First and second place camels, same as the first two of get_winners"""
+        res = []
+        for l in reversed(self.tiles.values()):
+            for thing in reversed(l):
+                if thing in WIN_CAMELS:
+                    res.append(thing)
+                    if len(res) == 2:
+                        return res[0], res[1]
+        return tuple(res)
+
+
+def _walk(state, dice: list, first: list, second: list, landings: list, done=None):
+    """
+    Apply each possible next roll once, recurse, and undo on the way back.
+    done(n) is called after each roll at this level with the rounds below it.
+    """
+    n = len(dice)
+    if n <= 1:
+        # The last die stays in the pyramid
+        a, b = state.leaders()
+        first[a] += 1
+        second[b] += 1
+        return
+    for i, die in enumerate(dice):
+        rest = dice[:i] + dice[i + 1 :]
+        below = n_leaves(rest)
+        colors = [BLACK, WHITE] if die == GREY else [die]
+        for spaces in range(1, 4):
+            for color in colors:
+                record, landing, n_moved, game_over = state.move(color, spaces)
+                # Every round below this roll shares its landings
+                if landing < N_TILES:
+                    landings[landing] += n_moved * below
+                if game_over:
+                    # Round ends right away, so all rounds below share the result
+                    a, b = state.leaders()
+                    first[a] += below
+                    second[b] += below
+                else:
+                    _walk(state, rest, first, second, landings)
+                state.undo(record)
+                if done is not None:
+                    done(below)
+
+
+def enumerate_leg(dice: tuple, board: tuple) -> tuple:
+    """
+    Count first place, second place and landings over every round of the leg.
+    Walks the die-order x roll-value tree depth-first so shared prefixes are simulated once.
+    Returns (first, second, landings, total) with the same counts as simulating each of get_rounds.
+    """
+    first = [0] * len(WIN_CAMELS)
+    second = [0] * len(WIN_CAMELS)
+    landings = [0] * N_TILES
+    try:
+        state = PackedBoard.from_tuple(board)
+    except ValueError:
+        state = TileState(Board.from_tuple(board).tiles)
+    total = n_leaves(dice)
+    progress = active_progress()
+    done = None
+    if progress is not None:
+        counted = 0
+
+        def done(n):
+            nonlocal counted
+            counted += n
+            progress.update(counted, total)
+
+    _walk(state, list(dice), first, second, landings, done)
+    return (
+        np.array(first, dtype=int),
+        np.array(second, dtype=int),
+        np.array(landings, dtype=int),
+        n_leaves(dice),
+    )
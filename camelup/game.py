@@ -1,58 +1,143 @@
+from typing import NamedTuple
+import threading
+import time
 import numpy as np
-import copy
-from tqdm import tqdm
-import itertools
-from functools import cache
 
 from camelup.constants import *
-from camelup.board import Board, simulate_round
+from camelup.board import Board, BoardOverlay, simulate_round
+from camelup.boosters import booster_legs
+from camelup.cache import bounded_cache
+from camelup.canonical import canonical
+from camelup.dp import dp_leg
+from camelup.engine import enumerate_leg
+from camelup.instrument import count, format_report, phase, report, timed
+from camelup.moves import (
+    BETS,
+    BOOSTS,
+    ROLLS,
+    Ally,
+    Bet,
+    Boost,
+    Loser,
+    Move,
+    Roll,
+    Winner,
+    read_move,
+)
+from camelup.parallel import active_pool
 from camelup.player import Player
-
-
-@cache
-def get_rounds(dice: tuple) -> list:
-    """Initialize all possible permutations of colors + dice rolls for a round"""
-    rounds = []
-    n_dice = len(dice)
-    for color in itertools.permutations(dice, n_dice - 1):
-        for rolls in itertools.product(range(1, 4), repeat=n_dice - 1):
-            if GREY in color:
-                res1 = []
-                res2 = []
-                for i in range(n_dice - 1):
-                    if color[i] == GREY:
-                        res1.append((BLACK, rolls[i]))
-                        res2.append((WHITE, rolls[i]))
-                    else:
-                        res1.append((color[i], rolls[i]))
-                        res2.append((color[i], rolls[i]))
-                rounds.extend([res1, res2])
-            else:
-                rounds.append([(color[i], rolls[i]) for i in range(n_dice - 1)])
-    return rounds
-
-
-@cache
+from camelup.progress import Cancelled, Progress, reporting
+from camelup.rollout import rollout_probabilities
+from camelup.rounds import RoundList, encode_rounds
+from camelup.sampling import (
+    SamplingConfig,
+    bet_value_se,
+    check_config,
+    ranking_settled,
+    sample_win_probabilities,
+)
+from camelup.store import active_store
+
+
+@bounded_cache("get_rounds", 16 * 2**20)
+def get_rounds(dice: tuple) -> RoundList:
+    """All possible permutations of colors + dice rolls for a round, read from the shared round table"""
+    return RoundList(encode_rounds(dice))
+
+
+@timed("win_probabilities")
 def win_probabilities(dice: tuple, board: tuple):
     """
     Calculate the probability of each camel winning
     """
-    first_place = np.zeros(len(WIN_CAMELS), dtype=int)
-    second_place = np.zeros(len(WIN_CAMELS), dtype=int)
-    total_landings = np.zeros(N_TILES, dtype=int)
-    rounds = get_rounds(dice)
-    for round in tqdm(rounds):
-        winners, _tiles, landings, _ = simulate_round(
-            Board.from_tuple(board).tiles, round
-        )
-        first_place[winners[0]] += 1
-        second_place[winners[1]] += 1
-        total_landings += landings
+    dice, board, perm = canonical(dice, board)
+    first, second, landings = leg_probabilities(dice, board)
+    return first[perm], second[perm], landings
+
+
+def is_cached(dice: tuple, board: tuple) -> bool:
+    """Would win_probabilities answer from memory?"""
+    dice, board, _ = canonical(dice, board)
+    return (dice, board) in leg_probabilities.cache
+
+
+@bounded_cache("win_probabilities", 256 * 2**20)
+def leg_probabilities(dice: tuple, board: tuple):
+    """win_probabilities of a canonical position"""
+    store = active_store()
+    if store is not None:
+        with phase("win_probabilities/store"):
+            stored = store.get(dice, board)
+        if stored is not None:
+            return stored
+    pool = active_pool()
+    children = {}
+    try:
+        if pool is not None:
+            with phase("win_probabilities/pool"):
+                first_place, second_place, total_landings, total = pool.leg(dice, board)
+        else:
+            with phase("win_probabilities/dp"):
+                first_place, second_place, total_landings, total = dp_leg(
+                    dice, board, children
+                )
+    except ValueError:
+        # Board can't be packed, walk it with the dict of tiles instead
+        with phase("win_probabilities/enumerate"):
+            first_place, second_place, total_landings, total = enumerate_leg(
+                dice, board
+            )
+    count("rounds", total)
+    # Whichever roll comes next, the position after it is already counted
+    for (rest, child), counts in children.items():
+        remember(rest, child, counts)
     # Calculate probability of each camel winning
-    total = len(rounds)
     fp = first_place / total
     sp = second_place / total
-    return fp, sp, total_landings / total
+    result = fp, sp, total_landings / total
+    if store is not None:
+        store.put(dice, board, result)
+    return result
+
+
+# The cache behind win_probabilities, keyed by canonical position
+win_probabilities.cache = leg_probabilities.cache
+win_probabilities.cache_clear = leg_probabilities.cache_clear
+
+
+def remember(dice: tuple, board: tuple, counts: tuple):
+    """Cache win_probabilities for a position some engine already counted on the way"""
+    dice, board, perm = canonical(dice, board)
+    if (dice, board) not in leg_probabilities.cache:
+        first, second, landings, total = counts
+        # Counts are in the colors of the position given, the cache is in canonical colors
+        canon_first = np.empty_like(first)
+        canon_first[perm] = first
+        canon_second = np.empty_like(second)
+        canon_second[perm] = second
+        leg_probabilities.cache.put(
+            (dice, board),
+            (canon_first / total, canon_second / total, landings / total),
+        )
+
+
+@timed("booster_probabilities")
+def booster_probabilities(dice: tuple, board: tuple, locations: list) -> tuple:
+    """
+    win_probabilities of board, and of board with either booster on each of locations.
+    Returns (base, {(location, booster): (board, probabilities)}), raises ValueError if the board can't be packed.
+    """
+    keys = [(loc, booster) for loc in locations for booster in [BOOST_POS, BOOST_NEG]]
+    overlay = BoardOverlay(board)
+    boards = [overlay.with_booster(loc, b).to_tuple() for loc, b in keys]
+    if not is_cached(dice, board) or not all(is_cached(dice, b) for b in boards):
+        base, candidates = booster_legs(dice, board, locations)
+        remember(dice, board, base)
+        for new_board, counts in candidates.values():
+            remember(dice, new_board, counts)
+    return win_probabilities(dice, board), {
+        key: (b, win_probabilities(dice, b)) for key, b in zip(keys, boards)
+    }
 
 
 def bet_value(amount: int, first_prob: float, second_prob: float):
@@ -60,6 +145,44 @@ def bet_value(amount: int, first_prob: float, second_prob: float):
     return first_prob * amount + second_prob + (1 - first_prob - second_prob) * (-1)
 
 
+@timed("overall_probabilities")
+@bounded_cache("overall_probabilities", 16 * 2**20)
+def overall_probabilities(dice: tuple, board: tuple, config: SamplingConfig):
+    """
+    Probability of each camel winning and losing the whole game, from games played out to the end.
+    Returns an OverallEstimate.
+    """
+    return rollout_probabilities(dice, board, config)
+
+
+def overall_bet_value(n_placed: int, prob: float):
+    """
+    Expected value of an overall winner or loser bet after n_placed others, assuming they all picked the same camel
+    """
+    payout = OVERALL_PAYOUTS[min(n_placed, len(OVERALL_PAYOUTS) - 1)]
+    return prob * payout + (1 - prob) * (-1)
+
+
+class RankedMove(NamedTuple):
+    """An option for the player with its expected value and the standard error of that value"""
+
+    value: float
+    error: float
+    move: str
+    # What to enter in parse_move to play it, a roll still needs its color and amount
+    command: str
+
+
+class MoveRanking(NamedTuple):
+    """
+    Options best first. exact is True when legs were enumerated rather than sampled,
+    overall winner and loser bets are always estimated from games played out.
+    """
+
+    moves: list
+    exact: bool
+
+
 class Game:
     def __init__(self, n_players: int = 2, setup=None) -> None:
         # Other players
@@ -78,6 +201,16 @@ class Game:
         self.game_over = False
         # A turn has been taken this round
         self.round_concluded = False
+        # SamplingConfig to estimate legs from sampled rounds, None to enumerate them
+        self.sampling = None
+        # How many games to play out when valuing overall winner and loser bets, None to leave those bets out
+        self.rollouts = SamplingConfig(budget=20000)
+        # Seconds optimal may take, sampling first and enumerating exactly if there is time. None to always enumerate
+        self.time_limit = None
+        # Ranks moves for optimal in place of rank_moves when set, called as planner(game, player_id)
+        self.planner = None
+        # What each move played with apply changed, for undo
+        self.history = []
 
     def __eq__(self, other):
         return (
@@ -129,23 +262,32 @@ class Game:
         self.players[player_id].bets.append((color, self.available_bets[color].pop()))
         return True
 
+    @staticmethod
+    def ally_bet(player: Player, first: list, second: list) -> tuple:
+        """The bet an ally with player is valued by, their best. Returns (value, color, amount)"""
+        player_bet_vals = [
+            bet_value(amount, first[color], second[color])
+            for color, amount in player.bets
+        ]
+        i = np.argmax(player_bet_vals)
+        return (player_bet_vals[i],) + tuple(player.bets[i])
+
     def best_ally(self, me_id: int, first: list, second: list):
         """Get the best ally for player_id, return value and index of ally"""
         ally_val = np.zeros(len(self.players), dtype=int)
         for i, player in enumerate(self.players):
             if player.id != me_id and player.ally is None and len(player.bets) > 0:
-                player_bet_vals = [
-                    bet_value(amount, first[color], second[color])
-                    for color, amount in player.bets
-                ]
-                ally_val[i] = max(player_bet_vals)
+                ally_val[i] = self.ally_bet(player, first, second)[0]
 
         ally_val, ally_index = np.max(ally_val), np.argmax(ally_val)
 
         return ally_val, ally_index
 
     def best_available_bet(self, first: np.ndarray, second: np.ndarray) -> tuple:
-        """Given the prob of coming in first or second, return the expected value of best bet and associated color"""
+        """
+        Given the prob of coming in first or second, return the expected value of best bet and associated color.
+        None once every leg bet is taken.
+        """
         vals = []
         colors = []
         for color, bets in self.available_bets.items():
@@ -153,36 +295,106 @@ class Game:
                 new_val = bet_value(bets[-1], first[color], second[color])
                 vals.append(new_val)
                 colors.append(color)
+        if not vals:
+            return None
         i = np.argmax(vals)
         return vals[i], colors[i]
 
-    def booster_value(self, me_id: int, loc: int, board: Board):
+    def probabilities(self, board: tuple, player_id: int = None) -> tuple:
+        """
+        First, second and landing probabilities for board with the dice left.
+        Exact unless self.sampling is set. When sampling for player_id, stop once their best bet, ally or roll is settled.
+        """
+        estimate = self.estimate(board, player_id)
+        if estimate is None:
+            return win_probabilities(tuple(self.dice), board)
+        return estimate.first, estimate.second, estimate.landings
+
+    def estimate(self, board: tuple, player_id: int = None):
+        """Sampled Estimate for board as probabilities uses it, None when results are exact"""
+        if self.sampling is None:
+            return None
+        # Outside the try, a budget of 0 must not pass for a board that can't be packed
+        check_config(self.sampling)
+        settled = None
+        if player_id is not None:
+            settled = lambda estimate: self.ranking_settled(player_id, estimate)
+        try:
+            estimate = sample_win_probabilities(
+                tuple(self.dice), board, self.sampling, settled
+            )
+        except ValueError:
+            # Board can't be packed for sampling
+            return None
+        count("rounds", estimate.n_samples)
+        return estimate
+
+    def ranking_settled(self, player_id: int, estimate) -> bool:
+        """Is the best of betting, allying and rolling clear of the rest, given the sampling error?"""
+        # Rolling is always worth exactly 1
+        values, errors = [1], [0]
+        for color, bets in self.available_bets.items():
+            if bets:
+                values.append(
+                    bet_value(bets[-1], estimate.first[color], estimate.second[color])
+                )
+                errors.append(bet_value_se(bets[-1], estimate, color))
+        for player in self.players:
+            if player.id != player_id and player.ally is None and len(player.bets) > 0:
+                value, color, amount = self.ally_bet(
+                    player, estimate.first, estimate.second
+                )
+                values.append(value)
+                errors.append(bet_value_se(amount, estimate, color))
+        return ranking_settled(values, errors, self.sampling.z)
+
+    @timed("booster_value")
+    def booster_value(self, me_id: int, loc: int, board: BoardOverlay):
         """If you were to remove the booster at loc, what value would it have?"""
-        first, second, landings = win_probabilities(tuple(self.dice), board.to_tuple())
-        booster_type = board.remove_booster(loc)
-        removed_first, removed_second, _ = win_probabilities(
-            tuple(self.dice), board.to_tuple()
-        )
+        first, second, landings = self.probabilities(board.to_tuple())
+        removed = board.without_booster(loc)
+        removed_first, removed_second, _ = self.probabilities(removed.to_tuple())
         first_delta = removed_first - first
         second_delta = removed_second - second
         change_ev = [
             bet_value(amount, first_delta[color], second_delta[color])
             for color, amount in self.players[me_id].bets
         ]
-        # Add it back
-        board.add_booster(loc, booster_type)
         return np.sum(change_ev) + landings[loc]
 
+    @timed("search_boosters")
+    def search_boosters(
+        self, me_id: int, board: BoardOverlay, locations: list
+    ) -> tuple:
+        """
+        Exact booster_value of either booster on every one of locations.
+        Returns (value, location, booster) of the best, raises ValueError if the board can't be packed.
+        """
+        (first, second, _), candidates = booster_probabilities(
+            tuple(self.dice), board.to_tuple(), locations
+        )
+        best = None
+        for (loc, booster), (_, (f, s, l)) in candidates.items():
+            change_ev = [
+                bet_value(amount, first[color] - f[color], second[color] - s[color])
+                for color, amount in self.players[me_id].bets
+            ]
+            val = np.sum(change_ev) + l[loc]
+            if best is None or val > best[0]:
+                best = (val, loc, booster)
+        return best
+
+    @timed("best_booster_bet")
     def best_booster_bet(self, me_id: int, landings: list):
         """
         Best place to put a booster
         1. Figure out the value of going from no booster to the current booster value
-        2. To avoid many board calculations, use maximal landings with current board state
-        3. Calculate the expected payout of putting booster there as +1 and -1
-        4. Calculate the change in expected value of existing bets of putting booster there as +1 and -1
-        5. Return the best location and type of booster, as well as the previous booster value
+        2. Calculate the expected payout of putting a +1 and -1 booster on every free tile
+        3. Calculate the change in expected value of existing bets of putting booster there as +1 and -1
+        4. Return the best location and type of booster, as well as the previous booster value
+        When sampling, only the tile with maximal landings with the current board state is tried.
         """
-        new_board = copy.deepcopy(self.board)
+        new_board = self.board.overlay()
         # 1. Maximal landings without your current booster, since you're considering moving it
         current_val = 0
         if self.players[me_id].boost is not None:
@@ -190,19 +402,27 @@ class Game:
             current_val = self.booster_value(
                 me_id, self.players[me_id].boost, new_board
             )
-            new_board.remove_booster(self.players[me_id].boost)
+            new_board = new_board.without_booster(self.players[me_id].boost)
 
-        # 2. Maximal landings with current booster state
         booster_locations = new_board.available_booster_locations()
+        if self.sampling is None:
+            try:
+                val, loc, booster = self.search_boosters(
+                    me_id, new_board, booster_locations
+                )
+                return val, loc, booster, current_val
+            except ValueError:
+                # Board can't be packed, only try the tile with most landings
+                pass
+
+        # 2. Maximal landings with current booster state
         booster_vals = landings[booster_locations]
         index_best = np.argmax(booster_vals)
         loc = booster_locations[index_best]
         ev = []
         possible_plays = [BOOST_POS, BOOST_NEG]
         for val in possible_plays:
-            new_board.add_booster(loc, val)
-            ev.append(self.booster_value(me_id, loc, new_board))
-            new_board.remove_booster(loc)
+            ev.append(self.booster_value(me_id, loc, new_board.with_booster(loc, val)))
         return (
             max(ev),
             loc,
@@ -210,25 +430,35 @@ class Game:
             current_val,
         )
 
-    def optimal_move(self, player_id: int):
+    def rank_moves(self, player_id: int, estimate=None) -> MoveRanking:
         """
-        Get the optimal move for player_id
+        Every move available to player_id with its expected value, best first
         Moves available:
         1. Choose available bet
         2. Choose ally
         3. Place tile
         4. Roll dice (+1)
-        # TODO
         5. Bet on overall winner
         6. Bet on overall loser
+        Errors are 0 for exact values. When sampling, a booster's error only counts the landings on its tile.
+        An Estimate of the current board already sampled can be passed in as estimate.
         """
-        print(f"Calculating optimal move")
-        first_place, second_place, landings = win_probabilities(
-            tuple(self.dice), self.board.to_tuple()
-        )
+        board = self.board.to_tuple()
+        if estimate is None:
+            estimate = self.estimate(board, player_id)
+        if estimate is None:
+            first_place, second_place, landings = win_probabilities(
+                tuple(self.dice), board
+            )
+        else:
+            first_place, second_place, landings = (
+                estimate.first,
+                estimate.second,
+                estimate.landings,
+            )
 
-        # 1. Choose available bet
-        bet_val, bet_color = self.best_available_bet(first_place, second_place)
+        # 1. Choose available bet, none once every leg bet is taken
+        best_bet = self.best_available_bet(first_place, second_place)
 
         # 2. Choose ally, if possible
         ally_val, ally_index = self.best_ally(player_id, first_place, second_place)
@@ -237,17 +467,108 @@ class Game:
         booster_val, booster_location, boost_type, current_val = self.best_booster_bet(
             player_id, landings
         )
-        vals = [bet_val, ally_val, booster_val, 1]
+        vals = [ally_val, booster_val, 1]
+        errors = [0, 0, 0]
+        if estimate is not None:
+            ally = self.players[ally_index]
+            if ally.bets:
+                # The error of the bet the ally is valued by, as ranking_settled has it
+                _, color, amount = self.ally_bet(ally, first_place, second_place)
+                errors[0] = bet_value_se(amount, estimate, color)
+            errors[1] = estimate.landings_se[booster_location]
         # Converts to 1-indexing for user readability
         options = [
-            f"Bet {color_to_str(bet_color)}",
             f"Ally Player {self.players[ally_index].id}",
             f"Boost location {booster_location + 1} {color_to_str(boost_type)} (current_val: {current_val:.2f})",
             "Roll dice",
         ]
+        commands = [
+            f"ally {self.players[ally_index].id}",
+            f"boost {booster_location + 1} {color_to_str(boost_type)}",
+            "roll",
+        ]
+        if best_bet is not None:
+            bet_val, bet_color = best_bet
+            amount = self.available_bets[bet_color][-1]
+            vals.insert(0, bet_val)
+            errors.insert(
+                0, 0 if estimate is None else bet_value_se(amount, estimate, bet_color)
+            )
+            options.insert(0, f"Bet {color_to_str(bet_color)}")
+            commands.insert(0, f"bet {color_to_str(bet_color)}")
+
+        # 5. and 6. Bet on overall winner or loser
+        overall = None
+        if self.rollouts is not None:
+            check_config(self.rollouts)
+            try:
+                overall = overall_probabilities(tuple(self.dice), board, self.rollouts)
+            except ValueError:
+                # Board can't be packed to play games out from
+                pass
+        if overall is not None:
+            for probs, se, bets, name in [
+                (overall.winner, overall.winner_se, self.winner_bets, "winner"),
+                (overall.loser, overall.loser_se, self.loser_bets, "loser"),
+            ]:
+                color = np.argmax(probs)
+                vals.append(overall_bet_value(len(bets), probs[color]))
+                # The value is linear in the probability
+                payout = OVERALL_PAYOUTS[min(len(bets), len(OVERALL_PAYOUTS) - 1)]
+                errors.append((payout + 1) * se[color])
+                options.append(f"Bet overall {name} {color_to_str(color)}")
+                commands.append(name)
         indices = np.flip(np.argsort(vals))
-        for i in indices:
-            print(f"{vals[i]:.2f}: {options[i]}")
+        return MoveRanking(
+            [RankedMove(vals[i], errors[i], options[i], commands[i]) for i in indices],
+            estimate is None,
+        )
+
+    @timed("optimal_move")
+    def optimal_move(self, player_id: int):
+        """Print the moves available to player_id, best first"""
+        print(f"Calculating optimal move")
+        for move in self.rank_moves(player_id).moves:
+            print(f"{move.value:.2f}: {move.move}")
+
+    def anytime_moves(
+        self,
+        player_id: int,
+        timeout: float,
+        sampling: SamplingConfig = SamplingConfig(budget=20000),
+        callback=None,
+    ) -> MoveRanking:
+        """
+        Best rank_moves for player_id available within timeout seconds.
+        Legs are sampled first, then enumerated exactly with whatever time is left.
+        callback(ranking) is called with each ranking as it becomes available.
+        The sampled ranking is always finished, even if it takes longer than timeout.
+        """
+        deadline = time.monotonic() + timeout
+        exact_sampling = self.sampling
+        self.sampling = sampling
+        try:
+            ranking = self.rank_moves(player_id)
+        finally:
+            self.sampling = exact_sampling
+        if callback is not None:
+            callback(ranking)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return ranking
+        cancelled = threading.Event()
+        timer = threading.Timer(remaining, cancelled.set)
+        timer.start()
+        try:
+            with reporting(Progress(cancelled=cancelled)):
+                ranking = self.rank_moves(player_id)
+        except Cancelled:
+            return ranking
+        finally:
+            timer.cancel()
+        if callback is not None:
+            callback(ranking)
+        return ranking
 
     def reset_round(self):
         """Reset a round"""
@@ -300,136 +621,213 @@ class Game:
         res += f"Loser bets: {self.loser_bets}\n"
         return res
 
-    def check_user_input(self, curr_player: int, move: str) -> tuple:
-        """Check user input for formatting and validity. Return tuple of move or None if invalid"""
-        if len(move) == 0:
-            return None
-        move = move.lower().strip().split(" ")
-
-        # help
-        if move[0] == "help":
-            print(
-                f"Enter one of the following: optimal, bet <color>, ally <player_id>, boost <location> <+/->, roll <color> <amount>, winner, loser, print"
+    def validate(self, player_id: int, move: Move):
+        """Why player_id can't play move, None if they can"""
+        if self.game_over:
+            return "Game is over"
+        if isinstance(move, Bet):
+            if move.color not in WIN_CAMELS:
+                return f"Invalid color: {color_to_str(move.color)}"
+            if len(self.available_bets[move.color]) == 0:
+                return f"No bets left on {color_to_str(move.color)}"
+        elif isinstance(move, Ally):
+            if move.player not in [p.id for p in self.players]:
+                return f"Invalid player id: {move.player}"
+            if self.players[move.player].ally is not None:
+                return f"Invalid ally: Player {move.player} already has an ally"
+            if self.players[player_id].ally is not None:
+                return f"Invalid ally: Player {player_id} already has an ally"
+            if player_id == move.player:
+                return f"Invalid ally: Player {player_id} cannot ally with themselves"
+        elif isinstance(move, Boost):
+            if move.value not in [BOOST_POS, BOOST_NEG]:
+                return f"Invalid location: {move.location + 1} and value: {move.value}"
+            if not 0 <= move.location < N_TILES:
+                sign = "+" if move.value == BOOST_POS else "-"
+                return f"Invalid location: {move.location + 1} and value: {sign}"
+        elif isinstance(move, Roll):
+            # Black and white are rolled from the grey die
+            die = GREY if move.color in [BLACK, WHITE] else move.color
+            if move.color == GREY:
+                return f"Invalid color: grey, use black or white"
+            if die not in self.dice:
+                return f"Invalid color: {color_to_str(move.color)}"
+            if not 1 <= move.amount <= 3:
+                return f"Invalid roll amount: {move.amount}"
+        elif not isinstance(move, (Winner, Loser)):
+            return f"Invalid move: {move}"
+        return None
+
+    def legal_moves(self, player_id: int) -> list:
+        """
+        Every move player_id can play. Boosters only go where the rules allow, validate also
+        accepts any other tile so a board entered from the table is never refused.
+        """
+        if self.game_over:
+            return []
+        me = self.players[player_id]
+        res = [BETS[c] for c, bets in self.available_bets.items() if bets]
+        if me.ally is None:
+            res += [
+                Ally(p.id) for p in self.players if p.id != player_id and p.ally is None
+            ]
+        overlay = self.board.overlay()
+        # Placing a booster takes the player's own back first
+        if me.boost is not None:
+            overlay = overlay.without_booster(me.boost)
+        for loc in overlay.available_booster_locations():
+            res += BOOSTS[loc]
+        for die in self.dice:
+            res += ROLLS[die]
+        return res + [Winner(), Loser()]
+
+    def apply(self, player_id: int, move: Move):
+        """Play move for player_id. Returns why it can't be played, None once it is"""
+        error = self.validate(player_id, move)
+        if error is not None:
+            return error
+        self.history.append((player_id, move, self._record(player_id, move)))
+        try:
+            self._play(player_id, move)
+        except Exception:
+            # Leave the game as it was, a crazy camel pushed off the start raises half way through a roll
+            self.undo()
+            raise
+        return None
+
+    def _play(self, player_id: int, move: Move):
+        if isinstance(move, Bet):
+            self.bet(player_id, move.color)
+        elif isinstance(move, Ally):
+            self.players[player_id].ally = move.player
+            self.players[move.player].ally = player_id
+        elif isinstance(move, Boost):
+            self.add_booster(player_id, move.location, move.value)
+        elif isinstance(move, Roll):
+            self.players[player_id].points += 1
+            winners, tiles, landings, game_over = simulate_round(
+                self.board.tiles, [(move.color, move.amount)]
             )
-            return None
-
-        # optimal
-        elif move[0] == "optimal":
-            return "optimal"
-
-        # bet <color>
-        elif move[0] == "bet":
-            if len(move) < 2:
-                return None
-            color = str_to_color(move[1])
-            if color is None:
-                print(f"Invalid color: {move[1]}. Please try again.")
-                return None
-            if color not in WIN_CAMELS:
-                print(f"Invalid color: {color_to_str(color)}. Please try again.")
-                return None
-            if len(self.available_bets[color]) == 0:
-                print(f"Invalid move: {move}. Please try again.")
+            self.board.tiles = tiles
+            self.dice.remove(GREY if move.color in [BLACK, WHITE] else move.color)
+            # Handout boost points
+            for player in self.players:
+                if player.boost is not None:
+                    player.points += landings[player.boost]
+            # Conclude if necessary
+            if len(self.dice) == 1:
+                self.conclude_round(winners)
+            if game_over:
+                self.game_over = True
+        elif isinstance(move, Winner):
+            self.winner_bets.append(player_id)
+        elif isinstance(move, Loser):
+            self.loser_bets.append(player_id)
+
+    def _record(self, player_id: int, move: Move):
+        """What undo needs to take move back, taken before it is played"""
+        if isinstance(move, Boost):
+            me = self.players[player_id]
+            if me.boost is None:
                 return None
-            print(
-                f"Player {curr_player} bet on {color_to_str(color)} with value {self.available_bets[color][-1]}"
-            )
-            return ("bet", color)
+            tile = self.board.tiles[me.boost]
+            return me.boost, BOOST_POS if BOOST_POS in tile else BOOST_NEG
+        if not isinstance(move, Roll):
+            return None
+        # A roll moves camels in place, but concluding the leg replaces the players' bets, the available bets
+        # and the dice rather than changing them, so those are kept as they are
+        tiles = {i: l.copy() for i, l in self.board.tiles.items() if l}
+        players = [(p.points, p.bets, p.ally, p.boost) for p in self.players]
+        return (
+            tiles,
+            players,
+            self.dice.copy(),
+            self.available_bets,
+            self.game_over,
+            self.round_concluded,
+        )
 
-        # ally <player_id>
-        elif move[0] == "ally":
-            if len(move) < 2:
-                return None
-            try:
-                player_id = int(move[1])
-            except:
-                print(f"Invalid player id: {move[1]}. Please try again.")
-                return None
-            if player_id not in [self.players[i].id for i in range(len(self.players))]:
-                print(f"Invalid player id: {player_id}. Please try again.")
-                return None
-            if self.players[player_id].ally is not None:
-                print(f"Invalid ally: Player {player_id} already has an ally")
-                return None
-            if self.players[curr_player].ally is not None:
-                print(f"Invalid ally: Player {curr_player} already has an ally")
-                return None
-            if curr_player == player_id:
-                print(f"Invalid ally: Player {curr_player} cannot ally with themselves")
-                return None
-            print(f"Player {curr_player} allied Player {player_id}")
-            return ("ally", player_id)
+    def undo(self):
+        """Take back the last move played with apply"""
+        player_id, move, record = self.history.pop()
+        me = self.players[player_id]
+        if isinstance(move, Bet):
+            _, amount = me.bets.pop()
+            self.available_bets[move.color].append(amount)
+        elif isinstance(move, Ally):
+            me.ally = None
+            self.players[move.player].ally = None
+        elif isinstance(move, Boost):
+            self.board.remove_booster(move.location)
+            me.boost = None
+            if record is not None:
+                me.boost = record[0]
+                self.board.add_booster(*record)
+        elif isinstance(move, Roll):
+            tiles, players, dice, available_bets, game_over, round_concluded = record
+            self.board.tiles = {i: tiles.get(i, []) for i in range(N_TILES)}
+            for p, (points, bets, ally, boost) in zip(self.players, players):
+                p.points, p.bets, p.ally, p.boost = points, bets, ally, boost
+            self.dice = dice
+            self.available_bets = available_bets
+            self.game_over = game_over
+            self.round_concluded = round_concluded
+        elif isinstance(move, Winner):
+            self.winner_bets.pop()
+        elif isinstance(move, Loser):
+            self.loser_bets.pop()
+
+    def snapshot(self) -> int:
+        """Mark to restore to, every move played with apply after it can be taken back"""
+        return len(self.history)
+
+    def restore(self, mark: int):
+        """Take back every move played since snapshot returned mark"""
+        while len(self.history) > mark:
+            self.undo()
+
+    def describe(self, player_id: int, move: Move) -> str:
+        """What playing move does, as announced before it is applied"""
+        if isinstance(move, Bet):
+            return f"Player {player_id} bet on {color_to_str(move.color)} with value {self.available_bets[move.color][-1]}"
+        if isinstance(move, Ally):
+            return f"Player {player_id} allied Player {move.player}"
+        if isinstance(move, Boost):
+            return f"Player {player_id} placed booster at {move.location + 1} with value {str(move)[-1]}"
+        if isinstance(move, Roll):
+            return f"Player {player_id} rolled {color_to_str(move.color)} {move.amount}"
+        if isinstance(move, Winner):
+            return f"Player {player_id} bet on overall winner"
+        return f"Player {player_id} bet on overall loser"
+
+    def check_user_input(self, curr_player: int, move: str):
+        """Check user input for formatting and validity. Return the move, a command, or None if invalid"""
+        if len(move.strip()) == 0:
+            return None
+        command = move.lower().strip().split(" ")[0]
 
-        # boost <location> <+/->
-        elif move[0] == "boost":
-            # Converts from user index by 1 to game index by 0
-            try:
-                viewer_location = int(move[1])
-                location = viewer_location - 1
-                value = move[2]
-            except:
-                print(f"Invalid move: {move}. Please try again.")
-                return None
-            if location < 0 or location >= N_TILES or value not in ["+", "-"]:
-                print(
-                    f"Invalid location: {viewer_location} and value: {value}. Please try again."
-                )
-                return None
+        # help
+        if command == "help":
             print(
-                f"Player {curr_player} placed booster at {viewer_location} with value {value}"
+                f"Enter one of the following: optimal, bet <color>, ally <player_id>, boost <location> <+/->, roll <color> <amount>, winner, loser, print, stats"
             )
-            value = BOOST_POS if value == "+" else BOOST_NEG
-            return ("boost", location, value)
-
-        # roll <color> <amount>
-        elif move[0] == "roll":
-            if len(move) < 3:
-                print(f"Invalid move: {move}. Please try again.")
-                return None
-            else:
-                color = str_to_color(move[1])
-                if color is None:
-                    print(f"Invalid color: {move[1]}. Please try again.")
-                    return None
-                # Special checks for black/white mapping to grey
-                if color in [BLACK, WHITE] and GREY not in self.dice:
-                    print(f"Invalid color: {move[1]}. Please try again.")
-                    return None
-                elif color not in [BLACK, WHITE] and color not in self.dice:
-                    print(f"Invalid color: {move[1]}. Please try again.")
-                    return None
-                # Can't roll a grey, must enter black or white
-                if color == GREY:
-                    print(
-                        f"Invalid color: {move[1]}, use black or white. Please try again."
-                    )
-                    return None
-                try:
-                    amount = int(move[2])
-                except:
-                    print(
-                        f"Invalid Non integer roll amount: {move[2]}. Please try again."
-                    )
-                    return None
-                if amount < 1 or amount > 3:
-                    print(f"Invalid roll amount: {amount}. Please try again.")
-                    return None
-            print(f"Player {curr_player} rolled {color_to_str(color)} {amount}")
-            return ("roll", color, amount)
-
-        # winner
-        elif move[0] == "winner":
-            return "winner"
-        # loser
-        elif move[0] == "loser":
-            return "loser"
-        # print
-        elif move[0] == "print":
-            return "print"
-        else:
             return None
+        # optimal, print, stats
+        elif command in ["optimal", "print", "stats"]:
+            return command
+
+        try:
+            cmd = read_move(move)
+        except ValueError as e:
+            print(f"{e}. Please try again.")
+            return None
+        error = self.validate(curr_player, cmd)
+        if error is not None:
+            print(f"{error}. Please try again.")
+            return None
+        return cmd
 
-    def parse_move(self, curr_player: int, move: list) -> bool:
+    def parse_move(self, curr_player: int, move: str) -> bool:
         """Parse move from player. Return 0 if no valid move was made, 1 otherwise"""
         cmd = self.check_user_input(curr_player, move)
         if cmd is None:
@@ -437,64 +835,33 @@ class Game:
 
         # optimal
         if cmd == "optimal":
-            self.optimal_move(curr_player)
+            if self.planner is not None:
+                print(f"Searching upcoming turns for the optimal move")
+                for m in self.planner(self, curr_player).moves:
+                    print(f"{m.value:.2f}: {m.move}")
+            elif self.time_limit is None:
+                self.optimal_move(curr_player)
+            else:
+                print(f"Calculating optimal move within {self.time_limit:g}s")
+                ranking = self.anytime_moves(curr_player, self.time_limit)
+                print("Exact" if ranking.exact else "Approximate")
+                for m in ranking.moves:
+                    print(f"{m.value:.2f} +/- {m.error:.2f}: {m.move}")
             return False
         # print
         elif cmd == "print":
             print(self)
             return False
-
-        # bet <color>
-        elif cmd[0] == "bet":
-            color = cmd[1]
-            self.bet(curr_player, color)
-
-        # ally <player_id>
-        elif cmd[0] == "ally":
-            player_id = cmd[1]
-            self.players[curr_player].ally = player_id
-            self.players[player_id].ally = curr_player
-
-        # boost <location> <+/->
-        elif cmd[0] == "boost":
-            location = cmd[1]
-            value = cmd[2]
-            self.add_booster(curr_player, location, value)
-
-        # roll <color> <amount>
-        elif cmd[0] == "roll":
-            color = cmd[1]
-            amount = cmd[2]
-            # Update board
-            self.players[curr_player].points += 1
-            winners, tiles, landings, game_over = simulate_round(
-                self.board.tiles, [(color, amount)]
-            )
-            self.board.tiles = tiles
-            if color == BLACK or color == WHITE:
-                color = GREY
-            self.dice.remove(color)
-            # Handout boost points
-            for player in self.players:
-                if player.boost is not None:
-                    player.points += landings[player.boost]
-            # Conclude if necessary
-            if len(self.dice) == 1:
-                print(f"Concluding round")
-                self.conclude_round(winners)
-            if game_over:
-                self.game_over = True
-                print("Game over")
-        # winner
-        elif cmd == "winner":
-            self.winner_bets.append(curr_player)
-            print(f"Player {curr_player} bet on overall winner")
-        # loser
-        elif cmd == "loser":
-            self.loser_bets.append(curr_player)
-            print(f"Player {curr_player} bet on overall loser")
-        else:
-            print(f"Invalid move: {move}. Please try again.")
+        # stats
+        elif cmd == "stats":
+            print(format_report(report()))
             return False
 
+        print(self.describe(curr_player, cmd))
+        concluding = isinstance(cmd, Roll) and len(self.dice) == 2
+        self.apply(curr_player, cmd)
+        if concluding:
+            print(f"Concluding round")
+        if self.game_over:
+            print("Game over")
         return True
@@ -0,0 +1,158 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+from camelup.cache import caches
+
+# Checked before anything is recorded, so instrumented code costs one global lookup when off
+_enabled = False
+_tracing = False
+_lock = threading.Lock()
+# name -> [calls, seconds]
+_timers = {}
+# name -> total
+_counters = {}
+# Complete events in the Chrome trace event format
+_events = []
+# Cache name -> (hits, misses) when recording started
+_cache_base = {}
+_start = time.perf_counter()
+
+
+def enable(trace: bool = False):
+    """Start recording timers and counters, and every timed call as a trace event if trace"""
+    global _enabled, _tracing
+    reset()
+    _tracing = trace
+    _enabled = True
+
+
+def disable():
+    global _enabled, _tracing
+    _enabled = False
+    _tracing = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Forget everything recorded so far, cache hits and misses count from now"""
+    global _start
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _events.clear()
+        _cache_base.clear()
+        for name, cache in caches().items():
+            stats = cache.stats()
+            _cache_base[name] = (stats.hits, stats.misses)
+        _start = time.perf_counter()
+
+
+def _record(name: str, start: float, end: float):
+    with _lock:
+        timer = _timers.setdefault(name, [0, 0.0])
+        timer[0] += 1
+        timer[1] += end - start
+        if _tracing:
+            _events.append(
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - _start) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                }
+            )
+
+
+def timed(name: str):
+    """Decorator recording calls and time spent in func under name"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Record the time spent in a with block under name"""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter())
+
+
+def count(name: str, n: int = 1):
+    """Add n to the counter name"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def report() -> dict:
+    """Timers, counters and cache use recorded since enable or reset"""
+    with _lock:
+        timers = {
+            name: {"calls": calls, "total_s": total, "mean_ms": total / calls * 1e3}
+            for name, (calls, total) in _timers.items()
+        }
+        counters = dict(_counters)
+    cache_use = {}
+    for name, cache in caches().items():
+        stats = cache.stats()
+        hits, misses = _cache_base.get(name, (0, 0))
+        cache_use[name] = {
+            "hits": stats.hits - hits,
+            "misses": stats.misses - misses,
+            "entries": stats.entries,
+            "bytes": stats.bytes,
+            "max_bytes": stats.max_bytes,
+        }
+    return {"timers": timers, "counters": counters, "caches": cache_use}
+
+
+def format_report(res: dict) -> str:
+    lines = []
+    for name, t in sorted(res["timers"].items(), key=lambda x: -x[1]["total_s"]):
+        lines.append(
+            f"{name}: {t['calls']} calls, {t['total_s']:.3f}s, {t['mean_ms']:.2f}ms each"
+        )
+    for name, n in sorted(res["counters"].items()):
+        lines.append(f"{name}: {n}")
+    for name, c in res["caches"].items():
+        lines.append(
+            f"cache {name}: {c['hits']} hits, {c['misses']} misses, {c['entries']} entries, "
+            f"{c['bytes'] / 2**20:.1f}/{c['max_bytes'] / 2**20:.0f} MB"
+        )
+    return "\n".join(lines)
+
+
+def dump_trace(path: str):
+    """Write recorded events as a Chrome trace, viewable in chrome://tracing or Perfetto"""
+    with _lock:
+        events = list(_events)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import Union
+
+from camelup.constants import *
+
+
+@dataclass(frozen=True)
+class Bet:
+    """Take the top leg bet left on a racing camel"""
+
+    color: int
+
+    def __str__(self) -> str:
+        return f"bet {color_to_str(self.color)}"
+
+
+@dataclass(frozen=True)
+class Ally:
+    """Ally with another player for the rest of the leg"""
+
+    player: int
+
+    def __str__(self) -> str:
+        return f"ally {self.player}"
+
+
+@dataclass(frozen=True)
+class Boost:
+    """Place, or move, the player's booster. location is indexed from 0, value is BOOST_POS or BOOST_NEG"""
+
+    location: int
+    value: int
+
+    def __str__(self) -> str:
+        return f"boost {self.location + 1} {'+' if self.value == BOOST_POS else '-'}"
+
+
+@dataclass(frozen=True)
+class Roll:
+    """A die rolled from the pyramid, the grey die rolls as BLACK or WHITE"""
+
+    color: int
+    amount: int
+
+    def __str__(self) -> str:
+        return f"roll {color_to_str(self.color)} {self.amount}"
+
+
+@dataclass(frozen=True)
+class Winner:
+    """Bet on the overall winner"""
+
+    def __str__(self) -> str:
+        return "winner"
+
+
+@dataclass(frozen=True)
+class Loser:
+    """Bet on the overall loser"""
+
+    def __str__(self) -> str:
+        return "loser"
+
+
+Move = Union[Bet, Ally, Boost, Roll, Winner, Loser]
+
+
+def read_move(text: str) -> Move:
+    """
+    Move from its text as entered at the prompt, str(move) reads back to the same move.
+    Words after the move are ignored. Raises ValueError when the text isn't a move,
+    whether the move can be played is up to Game.validate.
+    """
+    words = text.lower().strip().split(" ")
+    if words[0] == "winner":
+        return Winner()
+    if words[0] == "loser":
+        return Loser()
+    if words[0] == "bet":
+        if len(words) < 2:
+            raise ValueError(f"Missing color: {text}")
+        color = str_to_color(words[1])
+        if color is None:
+            raise ValueError(f"Invalid color: {words[1]}")
+        return Bet(color)
+    if words[0] == "ally":
+        if len(words) < 2:
+            raise ValueError(f"Missing player id: {text}")
+        try:
+            return Ally(int(words[1]))
+        except ValueError:
+            raise ValueError(f"Invalid player id: {words[1]}")
+    if words[0] == "boost":
+        # Converts from user index by 1 to game index by 0
+        try:
+            location = int(words[1]) - 1
+            sign = words[2]
+        except (IndexError, ValueError):
+            raise ValueError(f"Invalid move: {text}")
+        if sign not in ["+", "-"]:
+            raise ValueError(f"Invalid location: {location + 1} and value: {sign}")
+        return Boost(location, BOOST_POS if sign == "+" else BOOST_NEG)
+    if words[0] == "roll":
+        if len(words) < 3:
+            raise ValueError(f"Invalid move: {text}")
+        color = str_to_color(words[1])
+        if color is None:
+            raise ValueError(f"Invalid color: {words[1]}")
+        try:
+            return Roll(color, int(words[2]))
+        except ValueError:
+            raise ValueError(f"Invalid Non integer roll amount: {words[2]}")
+    raise ValueError(f"Invalid move: {text}")
+
+
+# Moves are immutable, legal move sets are built from these instead of new objects
+BETS = {color: Bet(color) for color in WIN_CAMELS}
+BOOSTS = {
+    location: [Boost(location, value) for value in [BOOST_POS, BOOST_NEG]]
+    for location in range(N_TILES)
+}
+# Rolls of each die in the pyramid
+ROLLS = {
+    die: [
+        Roll(color, amount)
+        for color in ([BLACK, WHITE] if die == GREY else [die])
+        for amount in range(1, 4)
+    ]
+    for die in DICE
+}
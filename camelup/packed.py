@@ -0,0 +1,202 @@
+from camelup.constants import *
+from camelup.board import Board
+
+# Furthest tile a camel can end up on: last tile + roll of 3 + booster
+MAX_TILE = N_TILES + 3
+
+
+class PackedBoard:
+    """
+    Compact board for the simulation hot path.
+    Each camel has a (tile, height) slot, tile is EMPTY if the camel is not on the board.
+    Boosters are kept as bitmaps over the tiles, which works as long as they never share a tile with a camel.
+    """
+
+    __slots__ = ("tile", "height", "count", "boost_pos", "boost_neg")
+
+    def __init__(self):
+        self.tile = [EMPTY] * N_CAMELS
+        self.height = [0] * N_CAMELS
+        # Number of camels stacked on each tile
+        self.count = [0] * (MAX_TILE + 1)
+        self.boost_pos = 0
+        self.boost_neg = 0
+
+    def __repr__(self) -> str:
+        return f"Packed{Board.from_tuple(self.to_tuple())}"
+
+    def __eq__(self, other) -> bool:
+        return (
+            self.tile == other.tile
+            and self.height == other.height
+            and self.boost_pos == other.boost_pos
+            and self.boost_neg == other.boost_neg
+        )
+
+    def copy(self):
+        new = PackedBoard.__new__(PackedBoard)
+        new.tile = self.tile.copy()
+        new.height = self.height.copy()
+        new.count = self.count.copy()
+        new.boost_pos = self.boost_pos
+        new.boost_neg = self.boost_neg
+        return new
+
+    def layout(self) -> tuple:
+        """Hashable camel layout. Boosters are left out since they do not move during a leg"""
+        return tuple(self.tile) + tuple(self.height)
+
+    @classmethod
+    def from_tuple(cls, data: tuple):
+        """Pack a Board.to_tuple(), raise ValueError if it can't be represented"""
+        board = cls()
+        for i, l in data:
+            if len(l) == 0:
+                continue
+            if i < 0 or i > MAX_TILE:
+                raise ValueError(f"Tile {i} is off the board")
+            if l[0] in [BOOST_POS, BOOST_NEG]:
+                if len(l) > 1 or i >= N_TILES:
+                    raise ValueError(f"Booster on tile {i} shares the tile: {l}")
+                if l[0] == BOOST_POS:
+                    board.boost_pos |= 1 << i
+                else:
+                    board.boost_neg |= 1 << i
+                continue
+            for height, camel in enumerate(l):
+                if camel not in CAMELS:
+                    raise ValueError(f"Can't stack {camel} on tile {i}: {l}")
+                if board.tile[camel] != EMPTY:
+                    raise ValueError(f"Camel {camel} is on the board twice")
+                board.tile[camel] = i
+                board.height[camel] = height
+            board.count[i] = len(l)
+        # A boosted camel would land on the neighbouring booster and stack with it
+        boosters = board.boost_pos | board.boost_neg
+        if boosters & (boosters << 1):
+            raise ValueError("Boosters on adjacent tiles")
+        return board
+
+    def to_tuple(self) -> tuple:
+        """Same format as Board.to_tuple"""
+        tiles = [[] for _ in range(MAX_TILE + 1)]
+        for camel in sorted(
+            [c for c in CAMELS if self.tile[c] != EMPTY],
+            key=lambda c: self.height[c],
+        ):
+            tiles[self.tile[camel]].append(camel)
+        for i in range(N_TILES):
+            if self.boost_pos >> i & 1:
+                tiles[i].append(BOOST_POS)
+            elif self.boost_neg >> i & 1:
+                tiles[i].append(BOOST_NEG)
+        # Tiles past the finish only exist once a camel got there
+        last = max([N_TILES - 1] + [t for t in self.tile if t >= N_TILES])
+        return tuple((i, tuple(tiles[i])) for i in range(last + 1))
+
+    @classmethod
+    def from_board(cls, board: Board):
+        return cls.from_tuple(board.to_tuple())
+
+    def to_board(self) -> Board:
+        return Board.from_tuple(self.to_tuple())
+
+    @classmethod
+    def from_dict(cls, setup: dict):
+        return cls.from_board(Board(setup))
+
+    def to_dict(self) -> dict:
+        """Same format as Board.to_dict"""
+        return self.to_board().to_dict()
+
+    def has_toppers(self, color: int) -> bool:
+        """Does this color exist on the board and have camels on top of it?"""
+        tile = self.tile[color]
+        return tile != EMPTY and self.height[color] < self.count[tile] - 1
+
+    def move(self, color: int, spaces: int) -> tuple:
+        """
+        Apply a roll the same way simulate_round does, return (record, landing, n_moved, game_over).
+        landing is the tile landed on before boosters, record is passed back to undo.
+        """
+        tile, height, count = self.tile, self.height, self.count
+        crazy = color == BLACK or color == WHITE
+        if crazy:
+            black_top = self.has_toppers(BLACK)
+            white_top = self.has_toppers(WHITE)
+            if black_top ^ white_top:
+                color = BLACK if black_top else WHITE
+            spaces = -spaces
+
+        my_tile = tile[color]
+        if my_tile == EMPTY:
+            raise ValueError(f"Camel {color} is not on the board")
+        my_height = height[color]
+        landing = my_tile + spaces
+        new_tile = landing
+        on_top = True
+        if new_tile < N_TILES:
+            new_tile %= N_TILES
+            if self.boost_neg >> new_tile & 1:
+                on_top = False
+                new_tile += 1 if crazy else -1
+            elif self.boost_pos >> new_tile & 1:
+                new_tile += -1 if crazy else 1
+        if new_tile < 0:
+            raise ValueError(f"Camel {color} was boosted off the start of the board")
+
+        n_moved = count[my_tile] - my_height
+        if on_top:
+            offset = count[new_tile] - my_height
+            for c in CAMELS:
+                if tile[c] == my_tile and height[c] >= my_height:
+                    tile[c] = new_tile
+                    height[c] += offset
+        else:
+            for c in CAMELS:
+                if tile[c] == my_tile and height[c] >= my_height:
+                    tile[c] = new_tile
+                    height[c] -= my_height
+                elif tile[c] == new_tile:
+                    height[c] += n_moved
+        count[my_tile] -= n_moved
+        count[new_tile] += n_moved
+        record = (my_tile, my_height, new_tile, n_moved, on_top)
+        return record, landing, n_moved, new_tile >= N_TILES
+
+    def undo(self, record: tuple):
+        """Undo the move that produced record"""
+        my_tile, my_height, new_tile, n_moved, on_top = record
+        tile, height, count = self.tile, self.height, self.count
+        if on_top:
+            base = count[new_tile] - n_moved
+            for c in CAMELS:
+                if tile[c] == new_tile and height[c] >= base:
+                    tile[c] = my_tile
+                    height[c] += my_height - base
+        else:
+            for c in CAMELS:
+                if tile[c] == new_tile:
+                    if height[c] < n_moved:
+                        tile[c] = my_tile
+                        height[c] += my_height
+                    else:
+                        height[c] -= n_moved
+        count[new_tile] -= n_moved
+        count[my_tile] += n_moved
+
+    def leaders(self) -> tuple:
+        """First and second place camels, same as the first two of get_winners"""
+        tile, height = self.tile, self.height
+        first = second = None
+        first_key = second_key = -N_CAMELS
+        for c in WIN_CAMELS:
+            if tile[c] == EMPTY:
+                continue
+            key = tile[c] * N_CAMELS + height[c]
+            if key > first_key:
+                second, second_key = first, first_key
+                first, first_key = c, key
+            elif key > second_key:
+                second, second_key = c, key
+        return first, second
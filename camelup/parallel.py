@@ -0,0 +1,127 @@
+import atexit
+import multiprocessing
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+from camelup.constants import *
+from camelup.batch import simulate_batch
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+from camelup.rounds import encode_rounds
+
+# Round tables this worker has attached to, by shared memory name
+_attached = {}
+
+
+def _count_shard(name: str, shape: tuple, board: tuple, start: int, stop: int):
+    """Worker side: simulate rounds [start, stop) of a shared round table"""
+    if name not in _attached:
+        shm = SharedMemory(name=name)
+        _attached[name] = (shm, np.ndarray(shape, dtype=np.int8, buffer=shm.buf))
+    rounds = _attached[name][1][start:stop]
+    first, second, landings, _ = simulate_batch(PackedBoard.from_tuple(board), rounds)
+    return (
+        np.bincount(first, minlength=len(WIN_CAMELS)),
+        np.bincount(second, minlength=len(WIN_CAMELS)),
+        landings.sum(axis=0, dtype=int),
+    )
+
+
+class LegPool:
+    """
+    Long-lived pool of worker processes that split the rounds of a leg between them.
+    Each round table is copied into shared memory once and workers read it from there.
+    """
+
+    def __init__(self, processes: int = None, shards_per_process: int = 4):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.shards_per_process = shards_per_process
+        # Workers must share our resource tracker, their own would unlink the tables when they exit
+        resource_tracker.ensure_running()
+        self.pool = multiprocessing.get_context().Pool(self.processes)
+        # dice -> SharedMemory holding encode_rounds(dice)
+        self.tables = {}
+        # Legs may be evaluated from several threads
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def table(self, dice: tuple) -> tuple:
+        """Shared memory name and shape of the round table for dice, created on first use"""
+        with self.lock:
+            if dice not in self.tables:
+                rounds = encode_rounds(dice)
+                shm = SharedMemory(create=True, size=max(rounds.nbytes, 1))
+                np.ndarray(rounds.shape, dtype=np.int8, buffer=shm.buf)[:] = rounds
+                self.tables[dice] = (shm, rounds.shape)
+            shm, shape = self.tables[dice]
+        return shm.name, shape
+
+    def leg(self, dice: tuple, board: tuple) -> tuple:
+        """
+        Same counts as batch_leg, with the rounds sharded across the workers.
+        Raises ValueError if the board can't be packed.
+        """
+        PackedBoard.from_tuple(board)
+        name, shape = self.table(dice)
+        n_rounds = shape[0]
+        n_shards = min(self.processes * self.shards_per_process, n_rounds)
+        bounds = np.linspace(0, n_rounds, n_shards + 1, dtype=int)
+        results = [
+            self.pool.apply_async(
+                _count_shard, (name, shape, board, bounds[i], bounds[i + 1])
+            )
+            for i in range(n_shards)
+        ]
+        progress = active_progress()
+        first = np.zeros(len(WIN_CAMELS), dtype=int)
+        second = np.zeros(len(WIN_CAMELS), dtype=int)
+        landings = np.zeros(N_TILES, dtype=int)
+        for i, result in enumerate(results):
+            f, s, l = result.get()
+            if progress is not None:
+                # Shards left running after a cancel finish in the workers and are dropped
+                progress.update(bounds[i + 1], n_rounds)
+            first += f
+            second += s
+            landings += l
+        return first, second, landings, n_rounds
+
+    def close(self):
+        """Stop the workers and free the shared round tables"""
+        self.pool.terminate()
+        self.pool.join()
+        for shm, _ in self.tables.values():
+            shm.close()
+            shm.unlink()
+        self.tables = {}
+
+
+_pool = None
+
+
+def start_pool(processes: int = None) -> LegPool:
+    """Opt in to evaluating legs on a pool of worker processes, reused until stop_pool"""
+    global _pool
+    if _pool is None:
+        _pool = LegPool(processes)
+        atexit.register(stop_pool)
+    return _pool
+
+
+def stop_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def active_pool():
+    """The running LegPool, None if legs are evaluated in this process"""
+    return _pool
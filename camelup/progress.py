@@ -0,0 +1,74 @@
+import contextlib
+import threading
+import time
+
+
+class Cancelled(Exception):
+    """Raised at a chunk boundary once a computation has been cancelled"""
+
+
+class Progress:
+    """
+    Progress callback and cancellation flag for the engines evaluating a leg.
+    callback(done, total) is called every `every` rounds or `interval` seconds, whichever comes first,
+    and when a computation finishes. cancelled is checked at every chunk boundary.
+    """
+
+    def __init__(
+        self,
+        callback=None,
+        every: int = None,
+        interval: float = None,
+        cancelled: threading.Event = None,
+    ):
+        self.callback = callback
+        self.every = every
+        self.interval = interval
+        self.cancelled = cancelled
+        self.last_done = 0
+        self.last_time = time.perf_counter()
+
+    def check(self):
+        """Raise Cancelled if the computation should stop"""
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise Cancelled()
+
+    def update(self, done: int, total: int):
+        """done of total rounds are counted"""
+        self.check()
+        if self.callback is None:
+            return
+        # A new computation started
+        if done < self.last_done:
+            self.last_done = 0
+        now = time.perf_counter()
+        due = done >= total
+        if self.every is not None and done - self.last_done >= self.every:
+            due = True
+        if self.interval is not None and now - self.last_time >= self.interval:
+            due = True
+        if self.every is None and self.interval is None:
+            due = True
+        if due:
+            self.last_done, self.last_time = done, now
+            self.callback(done, total)
+
+
+# Progress of the computations running in each thread
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def reporting(progress: Progress):
+    """Report progress of, and allow cancelling, every leg evaluated in this thread within the block"""
+    previous = active_progress()
+    _local.progress = progress
+    try:
+        yield progress
+    finally:
+        _local.progress = previous
+
+
+def active_progress():
+    """The Progress of this thread, None if computations run silently to the end"""
+    return getattr(_local, "progress", None)
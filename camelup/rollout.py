@@ -0,0 +1,93 @@
+from typing import NamedTuple
+import numpy as np
+
+from camelup.constants import *
+from camelup.batch import board_boosters, ranking, step_batch
+from camelup.instrument import count
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+from camelup.sampling import SamplingConfig, proportion_se, check_config
+
+
+class OverallEstimate(NamedTuple):
+    """Probability of each camel winning and losing the whole game, with standard errors"""
+
+    winner: np.ndarray
+    loser: np.ndarray
+    winner_se: np.ndarray
+    loser_se: np.ndarray
+    n_games: int
+
+
+def roll_legs(
+    dice: tuple, board: PackedBoard, n_games: int, rng: np.random.Generator
+) -> tuple:
+    """
+    Play n_games from the board to the end of the game, all games at once.
+    The current leg rolls all but one of dice, every later leg all but one of DICE, without boosters.
+    Returns the (winner, loser) camel of each game.
+    """
+    tile = np.tile(np.array(board.tile, dtype=np.int8), (n_games, 1))
+    height = np.tile(np.array(board.height, dtype=np.int8), (n_games, 1))
+    count = np.tile(np.array(board.count, dtype=np.int8), (n_games, 1))
+    boost_pos, boost_neg = board_boosters(board)
+    game_over = np.zeros(n_games, dtype=bool)
+    leg_dice = np.array(dice, dtype=np.int8)
+    while not game_over.all():
+        # Every game rolls the dice in its own order, the last one stays in the pyramid
+        n_steps = len(leg_dice) - 1
+        colors = rng.permuted(np.tile(leg_dice, (n_games, 1)), axis=1)[:, :n_steps]
+        grey = np.where(rng.random(colors.shape) < 0.5, BLACK, WHITE)
+        colors = np.where(colors == GREY, grey, colors)
+        rolls = rng.integers(1, 4, colors.shape, dtype=np.int8)
+        for step in range(n_steps):
+            # Games that already crossed the finish line are frozen
+            if game_over.any():
+                rows = np.flatnonzero(~game_over)
+                t, h, c = tile[rows], height[rows], count[rows]
+            else:
+                rows = slice(None)
+                t, h, c = tile, height, count
+            if len(t) == 0:
+                break
+            t, h, _, _, _, new_tile = step_batch(
+                t, h, c, colors[rows, step], rolls[rows, step], boost_pos, boost_neg
+            )
+            tile[rows], height[rows], count[rows] = t, h, c
+            game_over[rows] = new_tile >= N_TILES
+        # Start a new leg, as Game.reset_round does
+        leg_dice = np.array(DICE, dtype=np.int8)
+        boost_pos[:] = False
+        boost_neg[:] = False
+    order = ranking(tile, height)
+    return order[:, 0], order[:, -1]
+
+
+def rollout_probabilities(
+    dice: tuple, board: tuple, config: SamplingConfig = SamplingConfig()
+) -> OverallEstimate:
+    """
+    Estimate which camel wins and loses the game from config.budget games played out from the board.
+    Batch i always uses the i-th child stream of config.seed, so results are reproducible.
+    Raises ValueError if the board can't be packed or config can't draw a sample.
+    """
+    check_config(config)
+    packed = PackedBoard.from_tuple(board)
+    n_batches = -(-config.budget // config.batch_size)
+    streams = np.random.SeedSequence(config.seed).spawn(n_batches)
+    winner = np.zeros(len(WIN_CAMELS), dtype=int)
+    loser = np.zeros(len(WIN_CAMELS), dtype=int)
+    progress = active_progress()
+    n = 0
+    for stream in streams:
+        size = min(config.batch_size, config.budget - n)
+        w, l = roll_legs(dice, packed, size, np.random.default_rng(stream))
+        winner += np.bincount(w, minlength=len(WIN_CAMELS))
+        loser += np.bincount(l, minlength=len(WIN_CAMELS))
+        n += size
+        if progress is not None:
+            progress.update(n, config.budget)
+    count("games", n)
+    return OverallEstimate(
+        winner / n, loser / n, proportion_se(winner, n), proportion_se(loser, n), n
+    )
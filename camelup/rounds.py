@@ -0,0 +1,142 @@
+import itertools
+import os
+import tempfile
+from collections.abc import Sequence
+from functools import cache
+import numpy as np
+
+from camelup.constants import *
+from camelup.cache import bounded_cache
+from camelup.engine import n_leaves
+
+# Bump when the table layout changes so old files are not read
+TABLE_VERSION = 1
+
+
+def cache_dir() -> str:
+    """Directory for files shared by every camelup process on this host"""
+    return os.environ.get(
+        "CAMELUP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "camelup")
+    )
+
+
+def generate_rounds(dice: tuple) -> np.ndarray:
+    """
+    Every round of the leg, in get_rounds order, as an (n_rounds, n_dice - 1, 2) int8 array of (camel, roll)
+    """
+    n_steps = max(len(dice) - 1, 0)
+    rolls = np.array(
+        list(itertools.product(range(1, 4), repeat=n_steps)), dtype=np.int8
+    )
+    rolls = rolls.reshape(len(rolls), n_steps)
+    blocks = []
+    for colors in itertools.permutations(dice, n_steps):
+        colors = np.array(colors, dtype=np.int8).reshape(n_steps)
+        if GREY in colors:
+            # Black then white for every roll
+            block = np.empty((2 * len(rolls), n_steps, 2), dtype=np.int8)
+            block[:, :, 1] = np.repeat(rolls, 2, axis=0)
+            block[:, :, 0] = colors
+            block[0::2, colors == GREY, 0] = BLACK
+            block[1::2, colors == GREY, 0] = WHITE
+        else:
+            block = np.empty((len(rolls), n_steps, 2), dtype=np.int8)
+            block[:, :, 1] = rolls
+            block[:, :, 0] = colors
+        blocks.append(block)
+    return np.concatenate(blocks)
+
+
+def table_dice() -> list:
+    """Every dice tuple a game can have left, in the order they are stored in the table"""
+    res = []
+    for n in range(1, N_DICE + 1):
+        res.extend(itertools.combinations(DICE, n))
+    return res
+
+
+@cache
+def table_index() -> dict:
+    """dice -> first row of its rounds in the table"""
+    index = {}
+    offset = 0
+    for dice in table_dice():
+        index[dice] = offset
+        offset += n_leaves(dice)
+    return index
+
+
+def build_table(path: str):
+    """Write the rounds of every dice tuple into one padded int8 .npy file"""
+    blocks = []
+    for dice in table_dice():
+        rounds = generate_rounds(dice)
+        block = np.full((len(rounds), N_DICE - 1, 2), EMPTY, dtype=np.int8)
+        block[:, : rounds.shape[1]] = rounds
+        blocks.append(block)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write then rename, so other processes never map a half written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.concatenate(blocks))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+@cache
+def load_table():
+    """The round table, memory mapped so every process on the host shares its pages. None if it can't be stored"""
+    path = os.path.join(cache_dir(), f"rounds-v{TABLE_VERSION}.npy")
+    try:
+        if not os.path.exists(path):
+            build_table(path)
+        return np.load(path, mmap_mode="r")
+    except OSError:
+        return None
+
+
+@bounded_cache("encode_rounds", 64 * 2**20)
+def encode_rounds(dice: tuple) -> np.ndarray:
+    """
+    Every round of get_rounds(dice), in the same order, as a read-only (n_rounds, n_dice - 1, 2) array of (camel, roll).
+    Dice a game can have left are a view into the shared table, anything else is generated.
+    """
+    table = load_table()
+    index = table_index()
+    if table is not None and dice in index:
+        start = index[dice]
+        return table[start : start + n_leaves(dice), : max(len(dice) - 1, 0)]
+    rounds = generate_rounds(dice)
+    rounds.flags.writeable = False
+    return rounds
+
+
+class RoundList(Sequence):
+    """Read-only list of rounds, each a list of (color, spaces), backed by an encoded round table"""
+
+    def __init__(self, rounds: np.ndarray):
+        self.rounds = rounds
+
+    def __len__(self) -> int:
+        return len(self.rounds)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return [tuple(step) for step in self.rounds[i].tolist()]
+
+    def __iter__(self):
+        for round in self.rounds.tolist():
+            yield [tuple(step) for step in round]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"RoundList({len(self)} rounds)"
@@ -0,0 +1,122 @@
+from typing import NamedTuple
+import numpy as np
+
+from camelup.constants import *
+from camelup.batch import simulate_batch
+from camelup.packed import PackedBoard
+from camelup.progress import active_progress
+from camelup.rounds import encode_rounds
+
+
+class SamplingConfig(NamedTuple):
+    """How to sample a leg instead of enumerating it"""
+
+    # Most rounds to simulate
+    budget: int = 50000
+    # Rounds simulated between checks for an early stop
+    batch_size: int = 5000
+    seed: int = 0
+    # Standard errors two options must be apart to count as settled
+    z: float = 3.0
+
+
+def check_config(config: SamplingConfig):
+    """Raise ValueError if config can't draw a single sample"""
+    if config.budget < 1 or config.batch_size < 1:
+        raise ValueError(
+            f"Sampling needs a budget and batch size of at least 1, got {config.budget} and {config.batch_size}"
+        )
+
+
+class Estimate(NamedTuple):
+    """Sampled probabilities, with the standard error of each"""
+
+    first: np.ndarray
+    second: np.ndarray
+    landings: np.ndarray
+    first_se: np.ndarray
+    second_se: np.ndarray
+    landings_se: np.ndarray
+    n_samples: int
+
+
+def sample_win_probabilities(
+    dice: tuple,
+    board: tuple,
+    config: SamplingConfig = SamplingConfig(),
+    settled=None,
+) -> Estimate:
+    """
+    Estimate win_probabilities from rounds drawn uniformly from get_rounds(dice).
+    Batch i always uses the i-th child stream of config.seed, so results are reproducible.
+    Stops once settled(estimate) is True or the budget is spent.
+    Raises ValueError if the board can't be packed or config can't draw a sample.
+    """
+    check_config(config)
+    packed = PackedBoard.from_tuple(board)
+    rounds = encode_rounds(dice)
+    n_batches = -(-config.budget // config.batch_size)
+    streams = np.random.SeedSequence(config.seed).spawn(n_batches)
+
+    first = np.zeros(len(WIN_CAMELS), dtype=int)
+    second = np.zeros(len(WIN_CAMELS), dtype=int)
+    landings = np.zeros(N_TILES, dtype=int)
+    landings_sq = np.zeros(N_TILES, dtype=int)
+    progress = active_progress()
+    n = 0
+    for stream in streams:
+        size = min(config.batch_size, config.budget - n)
+        index = np.random.default_rng(stream).integers(0, len(rounds), size)
+        f, s, l, _ = simulate_batch(packed, rounds[index])
+        first += np.bincount(f, minlength=len(WIN_CAMELS))
+        second += np.bincount(s, minlength=len(WIN_CAMELS))
+        l = l.astype(int)
+        landings += l.sum(axis=0)
+        landings_sq += (l * l).sum(axis=0)
+        n += size
+        if progress is not None:
+            progress.update(n, config.budget)
+        estimate = _estimate(first, second, landings, landings_sq, n)
+        if settled is not None and settled(estimate):
+            break
+    return estimate
+
+
+def proportion_se(count: np.ndarray, n: int) -> np.ndarray:
+    """Standard error of count / n as a proportion of n draws"""
+    # Shrink towards 1/2 so a camel that never placed yet doesn't look certain
+    p = (count + 1) / (n + 2)
+    return np.sqrt(p * (1 - p) / n)
+
+
+def _estimate(first, second, landings, landings_sq, n) -> Estimate:
+    lp = landings / n
+    landings_var = np.maximum(landings_sq / n - lp * lp, 0)
+    return Estimate(
+        first / n,
+        second / n,
+        lp,
+        proportion_se(first, n),
+        proportion_se(second, n),
+        np.sqrt(landings_var / n),
+        n,
+    )
+
+
+def bet_value_se(amount: int, estimate: Estimate, color: int) -> float:
+    """Standard error of bet_value for a bet on color, from the sampled probabilities"""
+    f, s, n = estimate.first[color], estimate.second[color], estimate.n_samples
+    # bet_value is (amount + 1) * first + 2 * second - 1, first and second never happen together
+    var = (
+        (amount + 1) ** 2 * estimate.first_se[color] ** 2
+        + 4 * estimate.second_se[color] ** 2
+        - 4 * (amount + 1) * f * s / n
+    )
+    return np.sqrt(max(var, 0))
+
+
+def ranking_settled(values: list, errors: list, z: float) -> bool:
+    """Is the best value at least z standard errors clear of every other one?"""
+    best = int(np.argmax(values))
+    low = values[best] - z * errors[best]
+    return all(low > values[i] + z * errors[i] for i in range(len(values)) if i != best)
@@ -0,0 +1,228 @@
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import get_winners
+from camelup.game import (
+    Game,
+    MoveRanking,
+    RankedMove,
+    bet_value,
+    booster_probabilities,
+    win_probabilities,
+)
+from camelup.instrument import count, timed
+from camelup.moves import ROLLS, Ally, Bet, Boost, Move
+
+# How opponents are expected to choose their moves
+OPPONENTS = ["best", "greedy", "roll", "uniform"]
+
+
+def roll_outcomes(dice: list) -> list:
+    """(probability, Roll) of every way the next roll can come out"""
+    return [
+        (1 / (len(dice) * len(ROLLS[die])), roll) for die in dice for roll in ROLLS[die]
+    ]
+
+
+def leg_outcome(g: Game) -> tuple:
+    """win_probabilities of the game's leg, certain once a camel has crossed the finish"""
+    if not g.game_over:
+        return win_probabilities(tuple(g.dice), g.board.to_tuple())
+    winners = get_winners(g.board.tiles)
+    first, second = np.zeros(N_CAMELS), np.zeros(N_CAMELS)
+    first[winners[0]] = 1
+    second[winners[1]] = 1
+    return first, second, np.zeros(N_TILES)
+
+
+def leg_values(g: Game) -> np.ndarray:
+    """
+    Points every player expects to have once the leg is scored. An ally is valued as in Game.best_ally,
+    by the best of its partner's bets.
+    """
+    values = np.array([p.points for p in g.players], dtype=float)
+    # Nothing is riding on the leg, right after it was scored for one
+    if not any(p.bets or p.boost is not None for p in g.players):
+        return values
+    first, second, landings = leg_outcome(g)
+    for p in g.players:
+        bets = [
+            bet_value(amount, first[color], second[color]) for color, amount in p.bets
+        ]
+        values[p.id] += sum(bets)
+        if p.ally is not None:
+            values[p.ally] += max(bets + [0])
+        if p.boost is not None:
+            values[p.id] += landings[p.boost]
+    return values
+
+
+def search_key(g: Game) -> tuple:
+    """Everything that decides leg_values from here on"""
+    players = tuple(
+        (p.points, tuple(map(tuple, p.bets)), p.ally, p.boost) for p in g.players
+    )
+    bets = tuple(len(left) for left in g.available_bets.values())
+    return g.board.to_tuple(), tuple(g.dice), players, bets, g.game_over
+
+
+def describe(move: Move) -> str:
+    """Move as rank_moves words it, None is a roll"""
+    if move is None:
+        return "Roll dice"
+    if isinstance(move, Bet):
+        return f"Bet {color_to_str(move.color)}"
+    if isinstance(move, Ally):
+        return f"Ally Player {move.player}"
+    return f"Boost location {move.location + 1} {color_to_str(move.value)}"
+
+
+class Expectimax:
+    """
+    Searches the next depth turns of every player, up to the end of the leg, where every bet and booster is scored.
+    Rolls are chance nodes over every way the die can come out. The player searched for always takes their best move,
+    opponents choose by the opponents model:
+        best: their best move, searched as deeply
+        greedy: their best move over one turn, as rank_moves would pick it
+        roll: always roll
+        uniform: any move searched, with equal chance
+    Only bets, allies and boosters at the width tiles most landed on are tried, and below the first turn only
+    the width moves worth most over one turn, and rolling. Positions reached twice are searched once.
+    Call with (game, player_id) for a MoveRanking, so it can stand in for Game.rank_moves.
+    """
+
+    def __init__(self, depth: int = 2, opponents: str = "best", width: int = 2):
+        if opponents not in OPPONENTS:
+            raise ValueError(f"Unknown opponents model {opponents}")
+        if depth < 1:
+            raise ValueError(f"Search depth must be at least 1, got {depth}")
+        self.depth = depth
+        self.opponents = opponents
+        self.width = width
+        # (search_key, player to move, turns left) -> values
+        self.table = {}
+        self.root = None
+
+    def __call__(self, g: Game, player_id: int) -> MoveRanking:
+        return self.rank(g, player_id)
+
+    @timed("expectimax")
+    def rank(self, g: Game, player_id: int) -> MoveRanking:
+        """Every move tried for player_id with the points it gains them by the end of the leg, best first"""
+        self.root = player_id
+        self.table = {}
+        base = leg_values(g)[player_id]
+        moves = []
+        for move in self.candidates(g, player_id):
+            values = self.after(g, player_id, move, self.depth - 1)
+            moves.append(
+                RankedMove(
+                    float(values[player_id] - base),
+                    0.0,
+                    describe(move),
+                    "roll" if move is None else str(move),
+                )
+            )
+        moves.sort(key=lambda m: -m.value)
+        return MoveRanking(moves, True)
+
+    def candidates(self, g: Game, player_id: int) -> list:
+        """Moves to try for player_id, None for rolling"""
+        moves, boosts = [], []
+        for move in g.legal_moves(player_id):
+            if isinstance(move, (Bet, Ally)):
+                moves.append(move)
+            elif isinstance(move, Boost):
+                boosts.append(move)
+        if boosts:
+            _, _, landings = leg_outcome(g)
+            locations = sorted(
+                {m.location for m in boosts}, key=lambda loc: -landings[loc]
+            )[: self.width]
+            # A batch over all 6 dice costs several leg evaluations, below the root each board is evaluated on its own
+            if player_id == self.root or len(g.dice) < N_DICE:
+                self.warm_boosters(g, player_id, locations)
+            moves += [m for m in boosts if m.location in locations]
+        return moves + [None]
+
+    def warm_boosters(self, g: Game, player_id: int, locations: list):
+        """Evaluate the boosters player_id could place at locations in one pass"""
+        board = g.board.overlay()
+        if g.players[player_id].boost is not None:
+            board = board.without_booster(g.players[player_id].boost)
+        try:
+            booster_probabilities(tuple(g.dice), board.to_tuple(), locations)
+        except ValueError:
+            # Board can't be packed, each booster is evaluated on its own
+            pass
+
+    def after(self, g: Game, player_id: int, move: Move, depth: int) -> np.ndarray:
+        """Values once player_id plays move, None for rolling, with depth turns searched after it"""
+        if move is not None:
+            g.apply(player_id, move)
+            try:
+                return self.next_values(g, player_id, depth)
+            finally:
+                g.undo()
+        if depth == 0:
+            # Leg results are as likely before a roll as after it, rolling is worth 1 to the roller
+            values = leg_values(g)
+            values[player_id] += 1
+            return values
+        # The last die rolled ends the leg
+        ends = len(g.dice) == 2
+        values, total = 0, 0
+        for prob, roll in roll_outcomes(g.dice):
+            try:
+                g.apply(player_id, roll)
+            except KeyError:
+                # Crazy camel pushed off the start of the board, that roll can't happen
+                continue
+            try:
+                if ends or g.game_over:
+                    values = values + prob * leg_values(g)
+                else:
+                    values = values + prob * self.next_values(g, player_id, depth)
+            finally:
+                g.undo()
+            total += prob
+        return values / total
+
+    def next_values(self, g: Game, player_id: int, depth: int) -> np.ndarray:
+        if depth == 0 or g.game_over:
+            return leg_values(g)
+        return self.values(g, (player_id + 1) % len(g.players), depth)
+
+    def values(self, g: Game, player_id: int, depth: int) -> np.ndarray:
+        """Values with player_id to move and depth turns left to search"""
+        key = (search_key(g), player_id, depth)
+        if key in self.table:
+            return self.table[key]
+        count("expectimax/nodes")
+        model = "best" if player_id == self.root else self.opponents
+        if model == "roll":
+            moves = [None]
+        else:
+            # Order by what each move is worth over one turn, rolling is always searched
+            scored = [
+                (self.after(g, player_id, m, 0), m)
+                for m in self.candidates(g, player_id)
+            ]
+            scored.sort(key=lambda x: -x[0][player_id])
+            moves = [m for _, m in scored if m is not None][: self.width] + [None]
+            if model == "greedy":
+                moves = [scored[0][1]]
+            if depth == 1:
+                one_turn = {m: values for values, m in scored}
+        results = []
+        for m in moves:
+            if depth == 1 and model != "roll":
+                results.append(one_turn[m])
+            else:
+                results.append(self.after(g, player_id, m, depth - 1))
+        if model == "uniform":
+            res = np.mean(results, axis=0)
+        else:
+            res = max(results, key=lambda values: values[player_id])
+        self.table[key] = res
+        return res
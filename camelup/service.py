@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import BoardOverlay
+from camelup.bulk import analyze_state
+from camelup.cache import caches
+from camelup.game import Game, overall_probabilities, win_probabilities
+from camelup.speculate import search_boosters
+
+
+class Coalescer:
+    """Runs func once per key at a time, concurrent callers with the same key wait for that run and share its result"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> Future of the run in progress
+        self.running = {}
+        self.runs = 0
+        self.coalesced = 0
+
+    def run(self, key, func, *args):
+        with self.lock:
+            future = self.running.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.running[key] = future
+                self.runs += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.running[key]
+
+
+def prepare(dice: tuple, board: tuple, boost, rollouts):
+    """
+    Evaluate everything rank_moves needs that only depends on the position and the player's own booster,
+    so the ranking itself is answered from the caches
+    """
+    win_probabilities(dice, board)
+    base = BoardOverlay(board)
+    if boost is not None:
+        base = base.without_booster(boost)
+    try:
+        search_boosters(dice, base.to_tuple())
+    except ValueError:
+        # Board can't be packed, best_booster_bet only tries one tile
+        pass
+    try:
+        overall_probabilities(dice, board, rollouts)
+    except ValueError:
+        pass
+
+
+class Service:
+    """Answers optimal move queries from one set of caches shared by every client"""
+
+    def __init__(self, max_latencies: int = 10000):
+        self.coalescer = Coalescer()
+        self.lock = threading.Lock()
+        # Seconds taken by the most recent requests
+        self.latencies = deque(maxlen=max_latencies)
+        self.requests = 0
+        self.errors = 0
+
+    def optimal(self, data: dict) -> dict:
+        """Probabilities and ranked moves for {"game": Game.to_json(), "player": id}"""
+        g = Game.from_json(data["game"])
+        player_id = int(data.get("player", 0))
+        if not 0 <= player_id < len(g.players):
+            raise ValueError(f"No player {player_id}")
+        if g.game_over:
+            raise ValueError("Game is over")
+        dice, board = tuple(g.dice), g.board.to_tuple()
+        boost = g.players[player_id].boost
+        self.coalescer.run(
+            (dice, board, boost), prepare, dice, board, boost, g.rollouts
+        )
+        return analyze_state(g, player_id)
+
+    def record(self, seconds: float, error: bool):
+        with self.lock:
+            self.latencies.append(seconds)
+            self.requests += 1
+            self.errors += error
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = np.array(self.latencies)
+            res = {"requests": self.requests, "errors": self.errors}
+        res["coalesced"] = self.coalescer.coalesced
+        for name, q in [("p50_ms", 50), ("p99_ms", 99)]:
+            res[name] = (
+                float(np.percentile(latencies, q) * 1e3) if len(latencies) else None
+            )
+        res["caches"] = {
+            name: cache.stats()._asdict() for name, cache in caches().items()
+        }
+        return res
+
+
+class Handler(BaseHTTPRequestHandler):
+    """POST /optimal with a JSON body, GET /stats"""
+
+    service: Service = None
+
+    def send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.service.stats())
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/optimal":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length))
+            body = self.service.optimal(data)
+            status = 200
+        except (ValueError, KeyError, TypeError) as e:
+            body, status = {"error": repr(e)}, 400
+        except Exception as e:
+            body, status = {"error": repr(e)}, 500
+        self.service.record(time.perf_counter() - start, status != 200)
+        self.send_json(status, body)
+
+    def log_message(self, format, *args):
+        # Latencies are on /stats, don't write a line per request
+        pass
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000, service: Service = None):
+    """HTTP server answering on host:port from its own thread per request, call serve_forever to start"""
+    handler = type("ServiceHandler", (Handler,), {"service": service or Service()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
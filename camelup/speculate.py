@@ -0,0 +1,123 @@
+import threading
+
+from camelup.constants import *
+from camelup.board import Board, BoardOverlay, simulate_round
+from camelup.game import booster_probabilities, win_probabilities
+from camelup.progress import Cancelled, Progress, reporting
+
+
+def roll_positions(dice: tuple, board: tuple) -> list:
+    """
+    (dice, board) after every roll that could come next, as Game.parse_move would leave them.
+    A roll that ends the leg leads to the start of the next one. Rolls that end the game are left out.
+    """
+    res = []
+    for die in dice:
+        rest = tuple(d for d in dice if d != die)
+        colors = [BLACK, WHITE] if die == GREY else [die]
+        for color in colors:
+            for amount in range(1, 4):
+                new_board = Board.from_tuple(board)
+                try:
+                    _, tiles, _, game_over = simulate_round(
+                        new_board.tiles, [(color, amount)]
+                    )
+                except KeyError:
+                    # Crazy camel pushed off the start of the board
+                    continue
+                if game_over:
+                    continue
+                new_board.tiles = tiles
+                if len(rest) <= 1:
+                    new_board.reset_round()
+                    res.append((tuple(DICE), new_board.to_tuple()))
+                else:
+                    res.append((rest, new_board.to_tuple()))
+    return list(dict.fromkeys(res))
+
+
+def booster_bases(board: tuple) -> list:
+    """
+    Boards a booster search could start from: the board itself, then without each booster,
+    since a player looking to move their booster takes it back first
+    """
+    overlay = BoardOverlay(board)
+    return [board] + [
+        overlay.without_booster(loc).to_tuple() for loc in overlay.booster_tiles()
+    ]
+
+
+def search_boosters(dice: tuple, board: tuple):
+    """Warm the cache for every booster optimal_move could try on board"""
+    booster_probabilities(
+        dice, board, BoardOverlay(board).available_booster_locations()
+    )
+
+
+def speculate(
+    dice: tuple,
+    board: tuple,
+    cancelled: threading.Event,
+    evaluate,
+    boosters=search_boosters,
+) -> int:
+    """
+    Evaluate the position, then every position a roll could lead to, then every booster that could be placed, until cancelled.
+    evaluate(dice, board) and boosters(dice, board) are called once per position. Returns how many were done.
+    """
+    if cancelled.is_set():
+        return 0
+    # Legs being evaluated stop at their next chunk once cancelled
+    with reporting(Progress(cancelled=cancelled)):
+        try:
+            evaluate(dice, board)
+        except Cancelled:
+            return 0
+        n = 1
+        jobs = [(evaluate, position) for position in roll_positions(dice, board)]
+        jobs += [(boosters, (dice, base)) for base in booster_bases(board)]
+        for job, position in jobs:
+            if cancelled.is_set():
+                break
+            try:
+                job(*position)
+            except Cancelled:
+                break
+            except Exception:
+                # Only a guess at what comes next, the real query will report the error
+                continue
+            n += 1
+    return n
+
+
+class Speculator:
+    """
+    Warms the win_probabilities cache from a background thread while the game waits for a move.
+    Call start with the game's dice and board before blocking on input, and cancel as soon as the move is in.
+    """
+
+    def __init__(self, evaluate=win_probabilities, boosters=search_boosters):
+        self.evaluate = evaluate
+        self.boosters = boosters
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self, dice: tuple, board: tuple):
+        """Cancel stale work and start speculating from this position"""
+        self.cancel()
+        # Each run gets its own flag, so a run that is still finishing a position stays cancelled
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(
+            target=speculate,
+            args=(tuple(dice), board, self.cancelled, self.evaluate, self.boosters),
+            daemon=True,
+        )
+        self.thread.start()
+
+    def cancel(self):
+        """Stop at the next chunk of the position being evaluated, without waiting for it"""
+        self.cancelled.set()
+
+    def join(self, timeout: float = None):
+        if self.thread is not None:
+            self.thread.join(timeout)
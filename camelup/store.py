@@ -0,0 +1,123 @@
+import atexit
+import os
+import sqlite3
+import threading
+import numpy as np
+
+from camelup.constants import *
+from camelup.rounds import cache_dir
+
+# Bump whenever an engine change alters what win_probabilities returns
+RESULT_VERSION = 1
+
+
+class ResultStore:
+    """
+    win_probabilities results on disk, keyed by (remaining dice, board key).
+    Backed by SQLite in WAL mode so several processes on the host can read and write it at once.
+    """
+
+    def __init__(self, path: str = None, version: int = RESULT_VERSION):
+        self.path = path or os.path.join(cache_dir(), "results.sqlite")
+        self.version = version
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "version INTEGER, dice TEXT, board TEXT, "
+                "first BLOB, second BLOB, landings BLOB, "
+                "PRIMARY KEY (version, dice, board))"
+            )
+
+    def connection(self) -> sqlite3.Connection:
+        """Connection for this thread, connections are never shared across threads or forks"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, dice: tuple, board: tuple):
+        """Stored (first, second, landings) for this position, None if it was never stored"""
+        try:
+            row = (
+                self.connection()
+                .execute(
+                    "SELECT first, second, landings FROM results "
+                    "WHERE version = ? AND dice = ? AND board = ?",
+                    (self.version, repr(tuple(dice)), repr(board)),
+                )
+                .fetchone()
+            )
+        except sqlite3.OperationalError:
+            return None
+        if row is None:
+            return None
+        return tuple(np.frombuffer(x, dtype=np.float64).copy() for x in row)
+
+    def put(self, dice: tuple, board: tuple, result: tuple):
+        """Store (first, second, landings) for this position"""
+        first, second, landings = result
+        try:
+            with self.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        self.version,
+                        repr(tuple(dice)),
+                        repr(board),
+                        np.asarray(first, dtype=np.float64).tobytes(),
+                        np.asarray(second, dtype=np.float64).tobytes(),
+                        np.asarray(landings, dtype=np.float64).tobytes(),
+                    ),
+                )
+        except sqlite3.OperationalError:
+            # Store is busy or read-only, the result just isn't kept
+            pass
+
+    def __len__(self) -> int:
+        return (
+            self.connection()
+            .execute("SELECT COUNT(*) FROM results WHERE version = ?", (self.version,))
+            .fetchone()[0]
+        )
+
+    def prune(self) -> int:
+        """Delete results from other engine versions, return how many were removed"""
+        with self.connection() as conn:
+            return conn.execute(
+                "DELETE FROM results WHERE version != ?", (self.version,)
+            ).rowcount
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None and self.local.pid == os.getpid():
+            conn.close()
+        self.local = threading.local()
+
+
+_store = None
+
+
+def open_store(path: str = None) -> ResultStore:
+    """Opt in to keeping win_probabilities results on disk across sessions"""
+    global _store
+    if _store is None:
+        _store = ResultStore(path)
+        atexit.register(close_store)
+    return _store
+
+
+def close_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def active_store():
+    """The open ResultStore, None if results are not kept on disk"""
+    return _store
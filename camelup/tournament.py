@@ -0,0 +1,190 @@
+import multiprocessing
+import random
+import time
+from functools import partial
+from typing import NamedTuple
+import numpy as np
+
+from camelup.constants import *
+from camelup.board import get_winners
+from camelup.game import Game
+from camelup.moves import Ally, Bet, Boost, Roll, read_move
+from camelup.sampling import SamplingConfig, check_config
+from camelup.search import Expectimax
+
+
+def random_setup(rng: random.Random) -> dict:
+    """Starting board as the game is set up: racing camels on tiles 1 to 3, crazy camels on 14 to 16"""
+    order = rng.sample(WIN_CAMELS, len(WIN_CAMELS))
+    setup = {c: rng.randint(1, 3) for c in order}
+    setup.update({c: rng.randint(14, 16) for c in [WHITE, BLACK]})
+    return setup
+
+
+def draw_roll(g: Game, rng: random.Random) -> Roll:
+    """Draw a die from the pyramid and roll it"""
+    die = rng.choice(g.dice)
+    if die == GREY:
+        die = rng.choice([BLACK, WHITE])
+    return Roll(die, rng.randint(1, 3))
+
+
+def random_policy(g: Game, player_id: int, rng: random.Random):
+    """Roll, bet, ally or boost with equal chance, then any legal choice of that kind"""
+    kinds = {Bet: [], Ally: [], Boost: []}
+    for m in g.legal_moves(player_id):
+        if type(m) in kinds:
+            kinds[type(m)].append(m)
+    moves = rng.choice([[None]] + [moves for moves in kinds.values() if moves])
+    return rng.choice(moves)
+
+
+def _roll(g: Game, player_id: int, rng: random.Random):
+    """
+    Roll for player_id, drawing again while the roll pushes a crazy camel off the start of the board.
+    Game.apply takes such a roll back completely, so the game is never left half moved.
+    """
+    while True:
+        try:
+            g.apply(player_id, draw_roll(g, rng))
+            return
+        except KeyError:
+            continue
+
+
+def roll_policy(g: Game, player_id: int, rng: random.Random):
+    return None
+
+
+class OptimalPolicy:
+    """
+    The best move by Game.rank_moves, exact or from sampled rounds, or by planner(game, player_id) when given.
+    Overall winner and loser bets are left out, Game doesn't score them.
+    """
+
+    def __init__(self, sampling: SamplingConfig = None, planner=None):
+        self.sampling = sampling
+        self.planner = planner
+
+    def __call__(self, g: Game, player_id: int, rng: random.Random):
+        g.sampling = self.sampling
+        g.rollouts = None
+        rank = g.rank_moves if self.planner is None else partial(self.planner, g)
+        command = rank(player_id).moves[0].command
+        return None if command == "roll" else read_move(command)
+
+
+def make_policy(name: str):
+    """
+    Policy by name: random, roll, optimal, sampled[:<rounds>] for optimal from sampled rounds,
+    or search[:<depth>] for optimal from an Expectimax search
+    """
+    if name == "random":
+        return random_policy
+    if name == "roll":
+        return roll_policy
+    if name == "optimal":
+        return OptimalPolicy()
+    if name.split(":")[0] == "sampled":
+        budget = int(name.split(":")[1]) if ":" in name else 5000
+        check_config(SamplingConfig(budget=budget))
+        return OptimalPolicy(SamplingConfig(budget=budget))
+    if name.split(":")[0] == "search":
+        depth = int(name.split(":")[1]) if ":" in name else 2
+        return OptimalPolicy(planner=Expectimax(depth))
+    raise ValueError(f"Unknown policy {name}")
+
+
+def play_game(policies: list, rng: random.Random, max_turns: int = 1000) -> list:
+    """
+    Play one game with player i moving by policies[i], through Game.apply so nothing is printed.
+    A policy returns the move to play, or None to roll. A move the game rejects is replaced by a roll.
+    The last leg is scored when a camel crosses the finish.
+    Returns the points of each player.
+    """
+    g = Game(len(policies), random_setup(rng))
+    starter = player = 0
+    for _ in range(max_turns):
+        if g.game_over:
+            break
+        # Move the starter round by round, as main.py does
+        if g.round_concluded:
+            starter = (starter + 1) % len(policies)
+            player = starter
+            g.round_concluded = False
+        move = policies[player](g, player, rng)
+        if move is None or g.apply(player, move) is not None:
+            _roll(g, player, rng)
+        player = (player + 1) % len(policies)
+    if g.game_over and len(g.dice) < N_DICE:
+        g.conclude_round(get_winners(g.board.tiles))
+    return [p.points for p in g.players]
+
+
+class TournamentResult(NamedTuple):
+    policies: list
+    # Games won by each policy, ties are split
+    wins: np.ndarray
+    # (n_games, n_policies) points each policy scored
+    points: np.ndarray
+    seconds: float
+
+    @property
+    def games(self) -> int:
+        return len(self.points)
+
+    @property
+    def games_per_s(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        lines = []
+        for i, name in enumerate(self.policies):
+            p10, p50, p90 = np.percentile(self.points[:, i], [10, 50, 90])
+            lines.append(
+                f"{name}: win rate {self.wins[i] / self.games:.1%}, "
+                f"points mean {self.points[:, i].mean():.1f} (p10 {p10:g}, p50 {p50:g}, p90 {p90:g})"
+            )
+        lines.append(
+            f"{self.games} games in {self.seconds:.1f}s, {self.games_per_s:.2f} games/s"
+        )
+        return "\n".join(lines)
+
+
+def _play(names: list, seed: int, i: int, max_turns: int) -> list:
+    """Game i of a tournament, seats rotate so every policy moves first equally often"""
+    rng = random.Random(f"{seed}-{i}")
+    seats = [(i + j) % len(names) for j in range(len(names))]
+    points = play_game([make_policy(names[k]) for k in seats], rng, max_turns)
+    res = [0] * len(names)
+    for seat, k in enumerate(seats):
+        res[k] = points[seat]
+    return res
+
+
+def run_tournament(
+    names: list,
+    n_games: int,
+    processes: int = 0,
+    seed: int = 0,
+    max_turns: int = 1000,
+) -> TournamentResult:
+    """
+    Play n_games between the named policies, one player each, spread over processes worker processes
+    (0 to stay in this process). Game i is the same for a given seed however the games are spread.
+    """
+    for name in names:
+        make_policy(name)
+    start = time.perf_counter()
+    tasks = [(names, seed, i, max_turns) for i in range(n_games)]
+    if processes > 0:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            points = pool.starmap(_play, tasks)
+    else:
+        points = [_play(*task) for task in tasks]
+    points = np.array(points, dtype=float).reshape(n_games, len(names))
+    wins = np.zeros(len(names))
+    for row in points:
+        best = row == row.max()
+        wins[best] += 1 / best.sum()
+    return TournamentResult(names, wins, points, time.perf_counter() - start)
@@ -1,6 +1,14 @@
 from camelup.constants import *
+from camelup.cache import configure
 from camelup.game import Game
+from camelup.instrument import dump_trace, enable
+from camelup.parallel import start_pool
+from camelup.sampling import SamplingConfig
+from camelup.search import OPPONENTS, Expectimax
+from camelup.speculate import Speculator
+from camelup.store import open_store
 import argparse
+import atexit
 import json
 
 
@@ -23,9 +31,76 @@ def main():
         help="File to load setup from",
         default="default_setup.json",
     )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Worker processes to evaluate each leg with, 0 to use this process only",
+        default=0,
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        help="Estimate each leg from at most this many sampled rounds instead of all of them",
+        default=0,
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        help="Seconds optimal may take, answering from sampled rounds if the exact answer isn't ready",
+        default=None,
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        help="Turns of every player optimal searches ahead, 0 to value each move on its own",
+        default=0,
+    )
+    parser.add_argument(
+        "--opponents",
+        type=str,
+        choices=OPPONENTS,
+        help="How the search expects other players to move",
+        default="best",
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Don't keep leg results on disk across sessions",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        help="Memory budget in MB for leg results kept in this process",
+        default=256,
+    )
+    parser.add_argument(
+        "--no-speculate",
+        action="store_true",
+        help="Don't evaluate likely next positions while waiting for a move",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the solver and count rounds simulated, see them with the stats command",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Profile and write every timed call to this file on exit, for chrome://tracing or Perfetto",
+        default=None,
+    )
     args = parser.parse_args()
 
     print("Camel Up!!!\n")
+    configure("win_probabilities", max_bytes=args.cache_mb * 2**20)
+    if args.processes > 0:
+        start_pool(args.processes)
+    if not args.no_store:
+        open_store()
+    if args.profile or args.trace:
+        enable(trace=args.trace is not None)
+    if args.trace:
+        atexit.register(dump_trace, args.trace)
 
     # If specified, load game from save file
     if args.save_file:
@@ -38,6 +113,15 @@ def main():
         with open(args.setup, "r") as f:
             data = json.load(f)
         g = Game(args.n_players, data)
+    if args.samples > 0:
+        g.sampling = SamplingConfig(budget=args.samples)
+    g.time_limit = args.time_limit
+    if args.depth > 0:
+        g.planner = Expectimax(args.depth, args.opponents)
+    # Speculation warms the exact results cache, sampled results are never cached
+    speculator = None
+    if not args.no_speculate and g.sampling is None:
+        speculator = Speculator()
     round_starting_player = 0
     curr_player = round_starting_player
     while not g.game_over:
@@ -49,8 +133,13 @@ def main():
             print(f"New round, starting player: {curr_player}")
 
         s = "your" if curr_player == args.id else f"Player {curr_player}"
+        if speculator is not None:
+            speculator.start(g.dice, g.board.to_tuple())
+        move = input(f"Enter {s} move: ")
+        if speculator is not None:
+            speculator.cancel()
         # Advance to next player if this player made a move
-        if g.parse_move(curr_player, move=input(f"Enter {s} move: ")):
+        if g.parse_move(curr_player, move=move):
             # write to json
             with open(save_file, "w") as f:
                 json.dump(g.to_json(), f)
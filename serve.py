@@ -0,0 +1,51 @@
+from camelup.cache import configure
+from camelup.parallel import start_pool
+from camelup.service import make_server
+from camelup.store import open_store
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve Camel Up optimal moves over HTTP on this machine"
+    )
+    parser.add_argument(
+        "--host", type=str, help="Address to listen on", default="127.0.0.1"
+    )
+    parser.add_argument("--port", type=int, help="Port to listen on", default=8000)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Worker processes to evaluate each leg with, 0 to use this process only",
+        default=0,
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Don't keep leg results on disk across sessions",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=int,
+        help="Memory budget in MB for leg results kept in this process",
+        default=256,
+    )
+    args = parser.parse_args()
+
+    configure("win_probabilities", max_bytes=args.cache_mb * 2**20)
+    if args.processes > 0:
+        start_pool(args.processes)
+    if not args.no_store:
+        open_store()
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
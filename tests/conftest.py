@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def cache_root(tmp_path_factory):
+    """One round table per test session, built outside the developer's home"""
+    return tmp_path_factory.mktemp("camelup-cache")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(cache_root, monkeypatch):
+    monkeypatch.setenv("CAMELUP_CACHE_DIR", str(cache_root))
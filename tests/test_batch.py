@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.batch import batch_leg, batch_win_probabilities
+from camelup.rounds import encode_rounds
+from camelup.engine import enumerate_leg
+from camelup.game import get_rounds
+from tests.test_engine import BOARDS, PACKED_BOARDS, simulate_each_round
+
+
+@pytest.mark.parametrize(
+    "dice", [(RED,), (RED, GREY), (GREEN, RED, BLUE), (RED, YELLOW, BLUE, GREY)]
+)
+def test_encode_rounds(dice):
+    rounds = encode_rounds(dice)
+    assert rounds.shape == (len(get_rounds(dice)), len(dice) - 1, 2)
+    assert [[tuple(int(x) for x in step) for step in r] for r in rounds] == get_rounds(
+        dice
+    )
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+@pytest.mark.parametrize(
+    "dice", [(GREEN,), (RED, GREY), (RED, BLUE, GREY), (YELLOW, GREEN, PURPLE, GREY)]
+)
+def test_batch_leg(setup, dice):
+    board = Board(setup).to_tuple()
+    expected = simulate_each_round(dice, board)
+    result = batch_leg(dice, board)
+    for x, y in zip(expected, result):
+        assert np.array_equal(x, y)
+
+
+def test_batch_win_probabilities():
+    board = Board(BOARDS[0]).to_tuple()
+    first, second, landings, total = enumerate_leg(tuple(DICE), board)
+    fp, sp, lp = batch_win_probabilities(tuple(DICE), board)
+    assert np.array_equal(fp, first / total)
+    assert np.array_equal(sp, second / total)
+    assert np.array_equal(lp, landings / total)
+
+
+def test_not_packable():
+    with pytest.raises(ValueError):
+        batch_leg((RED, GREY), Board(BOARDS[-1]).to_tuple())
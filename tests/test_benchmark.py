@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from camelup.benchmark import (
+    BENCHMARK_VERSION,
+    _win_probabilities,
+    cases,
+    compare,
+    run_case,
+    run_suite,
+)
+
+
+def results(**cases):
+    return {
+        "version": BENCHMARK_VERSION,
+        "cases": {
+            name: {"wall_s": wall, "peak_rss_mb": rss}
+            for name, (wall, rss) in cases.items()
+        },
+    }
+
+
+def test_compare():
+    baseline = results(a=(1.0, 100), b=(1.0, 100), c=(1.0, 100))
+    current = results(a=(1.05, 100), b=(1.5, 100), c=(1.0, 200), d=(9.0, 900))
+    assert compare(baseline, current) == [
+        ("b", "wall_s", 1.0, 1.5),
+        ("c", "peak_rss_mb", 100, 200),
+    ]
+    assert compare(baseline, current, threshold=1.0) == []
+
+
+def test_compare_version():
+    baseline = results(a=(1.0, 100))
+    baseline["version"] = BENCHMARK_VERSION - 1
+    with pytest.raises(ValueError):
+        compare(baseline, results(a=(1.0, 100)))
+
+
+def test_cases():
+    names = cases()
+    for board in ["opening", "clustered", "near_finish", "boosters"]:
+        for n_dice in [6, 4, 2]:
+            assert f"win_probabilities/{n_dice} dice/{board}" in names
+        assert f"optimal_move/{board}" in names
+
+
+def test_run_suite():
+    logged = []
+    res = run_suite(
+        2, "win_probabilities/2 dice", lambda name, case: logged.append(name)
+    )
+    assert res["version"] == BENCHMARK_VERSION
+    assert len(res["cases"]) == 4
+    assert logged == list(res["cases"])
+    for case in res["cases"].values():
+        assert len(case["runs_s"]) == 2
+        assert case["wall_s"] > 0 and case["throughput"] > 0 and case["peak_rss_mb"] > 0
+        assert case["unit"] == "rounds/s"
+    assert compare(res, res) == []
+
+
+def test_peak_rss_own_pages():
+    # 200MB held here must not show up in the case's peak
+    held = np.ones(25_000_000)
+    _, _, rss = run_case(_win_probabilities, ("opening", 2))
+    assert 0 < rss < held.nbytes / 2**20
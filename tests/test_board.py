@@ -1,3 +1,4 @@
+import pickle
 import numpy as np
 from camelup.constants import *
 from camelup.board import Board, simulate_round
@@ -77,3 +78,31 @@ def test_booster_locations():
         }
     )
     assert b.available_booster_locations() == [1, 3, 7, 8, 9, 12, 13]
+
+
+def test_overlay():
+    setup = {YELLOW: 1, RED: 1, BLUE: 3, GREEN: 3, PURPLE: 5, WHITE: 14, BLACK: 15}
+    b = Board(setup)
+    b.add_booster(8, BOOST_NEG)
+    overlay = b.overlay()
+    key = b.to_tuple()
+    assert overlay.to_tuple() == key
+    assert overlay.booster_tiles() == b.booster_tiles() == [8]
+    assert overlay.booster_at(8) == BOOST_NEG
+    assert overlay.booster_at(9) is None
+    assert overlay.available_booster_locations() == b.available_booster_locations()
+
+    added = overlay.with_booster(11, BOOST_POS)
+    b.add_booster(11, BOOST_POS)
+    assert added.to_tuple() == b.to_tuple()
+    assert added.available_booster_locations() == b.available_booster_locations()
+    assert added.to_board() == b
+
+    removed = added.without_booster(8)
+    b.remove_booster(8)
+    assert removed.to_tuple() == b.to_tuple()
+    assert removed.without_booster(8) == removed
+    # The base is left alone
+    assert overlay.to_tuple() == key
+    assert pickle.loads(pickle.dumps(removed)) == removed
+    assert hash(removed) == hash(Board.from_tuple(removed.key).overlay())
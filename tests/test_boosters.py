@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board, BoardOverlay
+from camelup.boosters import booster_legs
+from camelup.dp import dp_leg
+from camelup.game import Game, win_probabilities
+from tests.test_engine import BOARDS, PACKED_BOARDS
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+@pytest.mark.parametrize("dice", [(GREEN,), (RED, GREY), (YELLOW, GREEN, PURPLE, GREY)])
+def test_booster_legs(setup, dice):
+    board = Board(setup)
+    locations = board.available_booster_locations()
+    base, candidates = booster_legs(dice, board.to_tuple(), locations)
+    for x, y in zip(dp_leg(dice, board.to_tuple()), base):
+        assert np.array_equal(x, y)
+    assert len(candidates) == 2 * len(locations)
+    for (location, booster), (new_board, counts) in candidates.items():
+        assert new_board == board.overlay().with_booster(location, booster).key
+        for x, y in zip(dp_leg(dice, new_board), counts):
+            assert np.array_equal(x, y)
+
+
+def test_not_packable():
+    with pytest.raises(ValueError):
+        booster_legs((RED, GREY), Board(BOARDS[-1]).to_tuple(), [5])
+
+
+def test_boosted_off_start():
+    board = Board(
+        {RED: 5, YELLOW: 5, PURPLE: 6, BLUE: 7, GREEN: 7, WHITE: 2, BLACK: 12}
+    )
+    # White rolling 1 lands on the first tile and is boosted back off the board
+    with pytest.raises(ValueError):
+        booster_legs((RED, GREY), board.to_tuple(), [0])
+
+
+def test_search_boosters():
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, BLUE, GREY]
+    g.bet(0, BLUE)
+    g.bet(0, RED)
+    win_probabilities.cache_clear()
+    locations = g.board.available_booster_locations()
+    val, location, booster = g.search_boosters(0, g.board.overlay(), locations)
+    best = max(
+        (g.booster_value(0, loc, g.board.overlay().with_booster(loc, b)), loc, b)
+        for loc in locations
+        for b in [BOOST_POS, BOOST_NEG]
+    )
+    assert val == pytest.approx(best[0])
+    assert (location, booster) == best[1:]
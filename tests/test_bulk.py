@@ -0,0 +1,120 @@
+import json
+import pytest
+from camelup.constants import *
+from camelup.bulk import BulkStats, analyze_file, state_key
+from camelup.game import Game, bet_value
+from camelup.sampling import SamplingConfig
+
+SETUP = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+
+
+def states() -> list:
+    """Saved games late in a leg, with repeats and a board that only differs in colors"""
+    res = []
+    for dice in [[RED, YELLOW, GREY], [RED, GREY], [BLUE, GREEN]]:
+        g = Game(2, SETUP)
+        g.dice = dice
+        res.append(g.to_json())
+    g = Game(2, SETUP)
+    g.dice = [RED, GREY]
+    g.bet(0, YELLOW)
+    res.append(g.to_json())
+    res.append(res[0])
+    # Red and yellow swapped, same leg
+    swapped = Game(2, {**SETUP, RED: 1, YELLOW: 1})
+    swapped.board.tiles[0] = [YELLOW, RED]
+    swapped.dice = [YELLOW, RED, GREY]
+    res.append(swapped.to_json())
+    return res
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "games.jsonl"
+    with open(path, "w") as f:
+        for data in states():
+            f.write(json.dumps(data) + "\n")
+        f.write("not json\n")
+        f.write("\n")
+        over = Game(2, SETUP).to_json()
+        over["game_over"] = True
+        f.write(json.dumps(over) + "\n")
+    return str(path)
+
+
+def read(path) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_state_key():
+    a, b = Game(2, SETUP), Game(2, SETUP)
+    b.bet(0, RED)
+    assert state_key(a) == state_key(b)
+    b.dice = [RED, GREY]
+    assert state_key(a) != state_key(b)
+
+
+def test_analyze_file(corpus, tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    stats = analyze_file(corpus, out, window=4)
+    assert stats.states == 8
+    assert stats.errors == 2
+    records = read(out)
+    assert [r["line"] for r in records] == [0, 1, 2, 3, 4, 5, 6, 8]
+    assert "error" in records[6] and "error" in records[7]
+    assert records[4] == {**records[0], "line": 4}
+    assert records[0]["exact"]
+    assert sum(records[0]["first"].values()) == pytest.approx(1)
+    values = [m["value"] for m in records[0]["moves"]]
+    assert values == sorted(values, reverse=True)
+    # Swapped colors give swapped results
+    assert records[5]["first"]["red"] == records[0]["first"]["yellow"]
+    assert stats.states_per_s > 0
+
+
+def test_resume(corpus, tmp_path):
+    full = str(tmp_path / "full.jsonl")
+    analyze_file(corpus, full, window=3)
+    out = str(tmp_path / "out.jsonl")
+
+    def crash(stats):
+        if stats.states >= 3:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        analyze_file(corpus, out, window=3, log=crash)
+    # Half a window written after the checkpoint
+    with open(out, "a") as f:
+        f.write('{"line": 3, "fir')
+    stats = analyze_file(corpus, out, window=3, resume=True)
+    assert stats.states == 8
+    assert read(out) == read(full)
+
+
+def test_processes(corpus, tmp_path):
+    single = str(tmp_path / "single.jsonl")
+    analyze_file(corpus, single, window=4)
+    multi = str(tmp_path / "multi.jsonl")
+    analyze_file(corpus, multi, processes=2, window=4)
+    assert read(multi) == read(single)
+
+
+def test_sampled(corpus, tmp_path):
+    out = str(tmp_path / "out.jsonl")
+    analyze_file(corpus, out, sampling=SamplingConfig(budget=400, batch_size=200))
+    records = read(out)
+    for data, record in zip(states(), records):
+        assert not record["exact"]
+        # The best bet is valued from the probabilities written out
+        g = Game.from_json(data)
+        bet = [m for m in record["moves"] if m["move"].startswith("Bet ")][0]
+        color = str_to_color(bet["move"].split(" ")[1])
+        first = record["first"][color_to_str(color)]
+        second = record["second"][color_to_str(color)]
+        value = bet_value(g.available_bets[color][-1], first, second)
+        assert bet["value"] == pytest.approx(value)
+    # One sample is shared by the leg, colors swapped with the board
+    assert records[4] == {**records[0], "line": 4}
+    assert records[5]["first"]["red"] == records[0]["first"]["yellow"]
+    assert records[5]["first"]["yellow"] == records[0]["first"]["red"]
@@ -0,0 +1,110 @@
+import numpy as np
+from camelup.cache import (
+    LFU,
+    LRU,
+    BoundedCache,
+    bounded_cache,
+    caches,
+    configure,
+    sizeof,
+)
+from camelup.game import get_rounds, win_probabilities
+
+
+def unit_size(obj):
+    """Keys cost one byte, values are free"""
+    return 1 if isinstance(obj, str) else 0
+
+
+def test_lru():
+    cache = BoundedCache("test_lru", 3, LRU, size=unit_size)
+    for key in ["a", "b", "c"]:
+        cache.put(key, 0)
+    assert cache.get("a") == 0
+    cache.put("d", 0)
+    # b was the least recently used
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert list(cache.entries) == ["c", "a", "d"]
+    assert cache.stats() == (1, 1, 1, 3, 3, 3)
+
+
+def test_lfu():
+    cache = BoundedCache("test_lfu", 3, LFU, size=unit_size)
+    for key in ["a", "b", "c"]:
+        cache.put(key, 0)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    cache.put("d", 0)
+    # c was used least
+    assert "c" not in cache
+    cache.put("e", 0)
+    # d is the newest, but used less than b
+    assert "d" not in cache
+    assert "b" in cache
+    assert cache.stats().evictions == 2
+
+
+def test_over_budget():
+    cache = BoundedCache("test_big", 100)
+    cache.put("small", 1)
+    cache.put("big", np.zeros(1000))
+    assert "big" not in cache
+    assert "small" in cache
+
+
+def test_sizeof():
+    assert sizeof(np.zeros(1000)) > 8000
+    view = np.zeros(1000)[10:]
+    assert sizeof(view) < 1000
+    assert sizeof((1, (2, 3))) > sizeof((2, 3))
+
+
+def test_decorator():
+    calls = []
+
+    @bounded_cache("test_square", 10**6)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert square(3) == 9
+    assert square(3) == 9
+    assert calls == [3]
+    assert caches()["test_square"] is square.cache
+    assert square.cache.stats().hits == 1
+    configure("test_square", max_bytes=0)
+    assert len(square.cache) == 0
+    square.cache_clear()
+
+
+def test_registered():
+    assert caches()["win_probabilities"] is win_probabilities.cache
+    assert caches()["get_rounds"] is get_rounds.cache
+
+
+def test_lfu_matches_scan():
+    # Evicts the same entries as taking the least used, least recently used, from every entry
+    rng = np.random.default_rng(0)
+    cache = BoundedCache("test_lfu_scan", 20, LFU, size=unit_size)
+    uses, order = {}, []
+    for _ in range(2000):
+        key = str(rng.integers(40))
+        if rng.random() < 0.5:
+            assert (cache.get(key) is not None) == (key in uses)
+            if key in uses:
+                uses[key] += 1
+                order.remove(key)
+                order.append(key)
+        else:
+            cache.put(key, 0)
+            if key in uses:
+                order.remove(key)
+            uses[key] = 1
+            order.append(key)
+            while len(order) > 20:
+                victim = min(order, key=uses.__getitem__)
+                order.remove(victim)
+                del uses[victim]
+        assert list(cache.entries) == order
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.canonical import canonical, reachable_tiles
+from camelup.engine import enumerate_leg
+from camelup.game import is_cached, win_probabilities
+from tests.test_engine import BOARDS
+
+SETUP = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+# Same race with the racing and the crazy camels in other colors
+SWAPPED = {GREEN: 1, PURPLE: 1, RED: 2, YELLOW: 3, BLUE: 3, BLACK: 14, WHITE: 15}
+SWAP = {RED: GREEN, YELLOW: PURPLE, PURPLE: RED, BLUE: YELLOW, GREEN: BLUE}
+
+
+def test_same_key():
+    dice = (RED, YELLOW, GREY)
+    a = canonical(dice, Board(SETUP).to_tuple())
+    b = canonical(
+        tuple(SWAP[d] if d in SWAP else d for d in dice), Board(SWAPPED).to_tuple()
+    )
+    assert a[:2] == b[:2]
+    assert canonical(*a[:2])[:2] == a[:2]
+
+
+@pytest.mark.parametrize("setup", BOARDS)
+@pytest.mark.parametrize("dice", [(GREEN,), (RED, GREY), (YELLOW, GREEN, PURPLE, GREY)])
+def test_results_mapped_back(setup, dice):
+    board = Board(setup).to_tuple()
+    first, second, landings, total = enumerate_leg(dice, board)
+    for x, y in zip(
+        [first / total, second / total, landings / total],
+        win_probabilities(dice, board),
+    ):
+        assert np.array_equal(x, y)
+
+
+def test_shared_entry():
+    win_probabilities.cache_clear()
+    first, second, landings = win_probabilities(
+        (RED, YELLOW, GREY), Board(SETUP).to_tuple()
+    )
+    swapped = Board(SWAPPED).to_tuple()
+    assert is_cached((GREEN, PURPLE, GREY), swapped)
+    f, s, l = win_probabilities((GREEN, PURPLE, GREY), swapped)
+    for color, other in SWAP.items():
+        assert f[other] == first[color]
+        assert s[other] == second[color]
+    assert np.array_equal(l, landings)
+
+
+def test_unreachable_boosters():
+    board = Board({RED: 6, YELLOW: 7, BLUE: 7, GREEN: 8, PURPLE: 8, WHITE: 9, BLACK: 9})
+    board.add_booster(2, BOOST_NEG)
+    board.add_booster(11, BOOST_POS)
+    board.add_booster(15, BOOST_POS)
+    # Two rolls can reach at most 8 tiles past the camel in front
+    assert reachable_tiles((RED, BLUE, YELLOW), board.to_tuple()) == set(range(5, 16))
+    _, key, _ = canonical((RED, BLUE, YELLOW), board.to_tuple())
+    assert key[2] == (2, ())
+    assert key[11] == (11, (BOOST_POS,))
+    # Crazy camels can go backward and wrap around
+    assert reachable_tiles((RED, GREY), board.to_tuple()) == set(range(1, 13))
+    _, key, _ = canonical((RED, GREY), board.to_tuple())
+    assert key[2] == (2, (BOOST_NEG,))
+    assert key[15] == (15, ())
+    # Nothing moves with one die left
+    assert reachable_tiles((RED,), board.to_tuple()) == set()
@@ -0,0 +1,59 @@
+from fractions import Fraction
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.dp import dp_leg, rational_win_probabilities
+from camelup.engine import enumerate_leg
+from tests.test_engine import BOARDS, PACKED_BOARDS, simulate_each_round
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+@pytest.mark.parametrize(
+    "dice", [(GREEN,), (RED, GREY), (RED, BLUE, GREY), (YELLOW, GREEN, PURPLE, GREY)]
+)
+def test_dp_leg(setup, dice):
+    board = Board(setup).to_tuple()
+    expected = simulate_each_round(dice, board)
+    result = dp_leg(dice, board)
+    for x, y in zip(expected, result):
+        assert np.array_equal(x, y)
+
+
+def test_full_leg():
+    board = Board(BOARDS[0]).to_tuple()
+    for x, y in zip(enumerate_leg(tuple(DICE), board), dp_leg(tuple(DICE), board)):
+        assert np.array_equal(x, y)
+
+
+def test_rational_win_probabilities():
+    board = Board(BOARDS[4]).to_tuple()
+    dice = (RED, YELLOW, BLUE, GREY)
+    first, second, landings, total = simulate_each_round(dice, board)
+    fp, sp, lp = rational_win_probabilities(dice, board)
+    assert sum(fp) == 1
+    assert sum(sp) == 1
+    assert fp == [Fraction(int(x), total) for x in first]
+    assert np.array_equal(np.array(fp, dtype=float), first / total)
+    assert np.array_equal(np.array(sp, dtype=float), second / total)
+    assert np.array_equal(np.array(lp, dtype=float), landings / total)
+
+
+def test_not_packable():
+    with pytest.raises(ValueError):
+        dp_leg((RED, GREY), Board(BOARDS[-1]).to_tuple())
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+def test_children(setup):
+    board = Board(setup).to_tuple()
+    dice = (RED, YELLOW, BLUE, GREY)
+    children = {}
+    result = dp_leg(dice, board, children)
+    for x, y in zip(dp_leg(dice, board), result):
+        assert np.array_equal(x, y)
+    assert len(children) > 0
+    for (rest, child), counts in children.items():
+        assert len(rest) == len(dice) - 1
+        for x, y in zip(dp_leg(rest, child), counts):
+            assert np.array_equal(x, y)
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board, simulate_round
+from camelup.engine import TileState, enumerate_leg, n_leaves
+from camelup.game import get_rounds
+
+
+def simulate_each_round(dice: tuple, board: tuple):
+    """Reference counts, one simulate_round per round"""
+    first = np.zeros(len(WIN_CAMELS), dtype=int)
+    second = np.zeros(len(WIN_CAMELS), dtype=int)
+    landings = np.zeros(N_TILES, dtype=int)
+    rounds = get_rounds(dice)
+    for round in rounds:
+        winners, _, l, _ = simulate_round(Board.from_tuple(board).tiles, round)
+        first[winners[0]] += 1
+        second[winners[1]] += 1
+        landings += l
+    return first, second, landings, len(rounds)
+
+
+BOARDS = [
+    {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15},
+    {
+        BLACK: 1,
+        RED: 1,
+        YELLOW: 1,
+        PURPLE: 8,
+        BLUE: 8,
+        GREEN: 8,
+        WHITE: 8,
+        BOOST_NEG: [16],
+    },
+    {
+        YELLOW: 10,
+        GREEN: 12,
+        RED: 12,
+        BLUE: 12,
+        BLACK: 14,
+        PURPLE: 15,
+        WHITE: 15,
+        BOOST_POS: [11],
+        BOOST_NEG: [14],
+    },
+    {
+        WHITE: 14,
+        RED: 14,
+        BLACK: 13,
+        BLUE: 13,
+        GREEN: 3,
+        YELLOW: 3,
+        PURPLE: 3,
+        BOOST_NEG: [12],
+    },
+    # Boosters on both sides of a stack, apart from every camel
+    {
+        YELLOW: 10,
+        GREEN: 12,
+        RED: 12,
+        BLUE: 12,
+        BLACK: 14,
+        PURPLE: 15,
+        WHITE: 15,
+        BOOST_POS: [11],
+        BOOST_NEG: [9],
+    },
+    # Booster placed on top of a camel, can't be packed
+    {
+        RED: 2,
+        YELLOW: 2,
+        PURPLE: 2,
+        BLUE: 3,
+        GREEN: 5,
+        WHITE: 14,
+        BLACK: 15,
+        BOOST_POS: [2],
+    },
+]
+# Boards PackedBoard can hold, the others have a booster on a camel's tile
+PACKED_BOARDS = [BOARDS[i] for i in [0, 1, 3, 4]]
+
+
+@pytest.mark.parametrize("setup", BOARDS)
+@pytest.mark.parametrize(
+    "dice", [(GREEN,), (RED, GREY), (RED, BLUE, GREY), (YELLOW, GREEN, PURPLE, GREY)]
+)
+def test_enumerate_leg(setup, dice):
+    board = Board(setup).to_tuple()
+    expected = simulate_each_round(dice, board)
+    result = enumerate_leg(dice, board)
+    for x, y in zip(expected, result):
+        assert np.array_equal(x, y)
+
+
+def test_n_leaves():
+    for dice in [(RED,), (RED, GREY), (RED, GREEN, BLUE), (RED, BLUE, GREEN, GREY)]:
+        assert n_leaves(dice) == len(get_rounds(dice))
+    assert n_leaves(tuple(DICE)) == 320760
+
+
+def test_undo():
+    b = Board(BOARDS[1])
+    state = TileState(Board(BOARDS[1]).tiles)
+    record, landing, n_moved, game_over = state.move(BLACK, 1)
+    assert game_over
+    assert landing == -1
+    assert n_moved == 3
+    state.undo(record)
+    assert state.tiles == b.tiles
@@ -1,7 +1,9 @@
+import copy
 import numpy as np
 from camelup.constants import *
-from camelup.game import Game, get_rounds, bet_value, win_probabilities
+from camelup.game import Game, get_rounds, bet_value, is_cached, win_probabilities
 from camelup.board import get_winners
+from camelup.moves import Ally, Bet, Boost, Loser, Roll, Winner, read_move
 import pytest
 
 
@@ -26,10 +28,10 @@ def test_check_user_input_easy(game):
     assert game.check_user_input(0, "blahblah") is None
     assert game.check_user_input(0, "optimal") == "optimal"
     assert game.check_user_input(0, "optimal 2") == "optimal"
-    assert game.check_user_input(0, "winner") == "winner"
-    assert game.check_user_input(0, "winner 2") == "winner"
-    assert game.check_user_input(0, "loser") == "loser"
-    assert game.check_user_input(0, "loser 2") == "loser"
+    assert game.check_user_input(0, "winner") == Winner()
+    assert game.check_user_input(0, "winner 2") == Winner()
+    assert game.check_user_input(0, "loser") == Loser()
+    assert game.check_user_input(0, "loser 2") == Loser()
     assert game.check_user_input(0, "print") == "print"
     assert game.check_user_input(0, "print 2") == "print"
     assert game.check_user_input(0, "help") is None
@@ -37,8 +39,8 @@ def test_check_user_input_easy(game):
 
 def test_check_user_input_betting(game):
     # Betting
-    assert game.check_user_input(0, "bet red") == ("bet", RED)
-    assert game.check_user_input(0, "bet red 3") == ("bet", RED)
+    assert game.check_user_input(0, "bet red") == Bet(RED)
+    assert game.check_user_input(0, "bet red 3") == Bet(RED)
     assert game.check_user_input(0, "bet redd") is None
     game.available_bets[RED] = []
     assert game.check_user_input(0, "bet red") is None
@@ -46,8 +48,8 @@ def test_check_user_input_betting(game):
 
 def test_check_user_input_ally(game):
     # Allying
-    assert game.check_user_input(0, "ally 2") == ("ally", 2)
-    assert game.check_user_input(0, "ally 2 lsdf") == ("ally", 2)
+    assert game.check_user_input(0, "ally 2") == Ally(2)
+    assert game.check_user_input(0, "ally 2 lsdf") == Ally(2)
     assert game.check_user_input(0, "ally") is None
     assert game.check_user_input(0, "ally 4") is None
     game.players[0].ally = 1
@@ -58,29 +60,48 @@ def test_check_user_input_ally(game):
 
 def test_check_user_input_boost(game):
     # Boosting
-    assert game.check_user_input(0, "boost 3 +") == ("boost", 2, BOOST_POS)
-    assert game.check_user_input(0, "boost 3 + blah") == ("boost", 2, BOOST_POS)
-    assert game.check_user_input(0, "boost 3 -") == ("boost", 2, BOOST_NEG)
+    assert game.check_user_input(0, "boost 3 +") == Boost(2, BOOST_POS)
+    assert game.check_user_input(0, "boost 3 + blah") == Boost(2, BOOST_POS)
+    assert game.check_user_input(0, "boost 3 -") == Boost(2, BOOST_NEG)
     assert game.check_user_input(0, "boost x -") is None
     assert game.check_user_input(0, "boost 3 1") is None
     assert game.check_user_input(0, "boost 17 +") is None
     assert game.check_user_input(0, "boost 0 +") is None
-    assert game.check_user_input(0, "boost 16 +") == ("boost", 15, BOOST_POS)
+    assert game.check_user_input(0, "boost 16 +") == Boost(15, BOOST_POS)
+
+
+@pytest.mark.parametrize(
+    "move,message",
+    [
+        ("boost 17 +", "Invalid location: 17 and value: +"),
+        ("boost 0 -", "Invalid location: 0 and value: -"),
+        ("boost 3 1", "Invalid location: 3 and value: 1"),
+        ("boost x -", "Invalid move: boost x -"),
+        ("bet", "Missing color: bet"),
+        ("bet redd", "Invalid color: redd"),
+        ("bet red", "No bets left on red"),
+        ("ally 0", "Invalid ally: Player 0 cannot ally with themselves"),
+    ],
+)
+def test_check_user_input_messages(game, capsys, move, message):
+    game.available_bets[RED] = []
+    assert game.check_user_input(0, move) is None
+    assert capsys.readouterr().out == f"{message}. Please try again.\n"
 
 
 def test_roll(game):
     # Rolling
     assert game.check_user_input(0, "roll") is None
-    assert game.check_user_input(0, "roll red 1") == ("roll", RED, 1)
-    assert game.check_user_input(0, "roll purple 3") == ("roll", PURPLE, 3)
+    assert game.check_user_input(0, "roll red 1") == Roll(RED, 1)
+    assert game.check_user_input(0, "roll purple 3") == Roll(PURPLE, 3)
     assert game.check_user_input(0, "roll red 4") is None
     assert game.check_user_input(0, "roll asldkjf 1") is None
     game.dice = [RED, YELLOW, BLUE, GREEN, GREY]
     assert game.check_user_input(0, "roll purple 1") is None
     assert game.check_user_input(0, "roll grey 1") is None
-    assert game.check_user_input(0, "roll black 1") == ("roll", BLACK, 1)
+    assert game.check_user_input(0, "roll black 1") == Roll(BLACK, 1)
     game.dice = [RED, YELLOW, BLUE, GREEN, GREY]
-    assert game.check_user_input(0, "roll white 2") == ("roll", WHITE, 2)
+    assert game.check_user_input(0, "roll white 2") == Roll(WHITE, 2)
 
 
 def test_optimal_move():
@@ -93,6 +114,70 @@ def test_optimal_move():
     g.optimal_move(g.players[0].id)
 
 
+def test_rank_moves(capsys):
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, GREY]
+    g.bet(0, RED)
+    ranking = g.rank_moves(0)
+    assert ranking.exact
+    values = [m.value for m in ranking.moves]
+    assert values == sorted(values, reverse=True)
+    assert [m.error for m in ranking.moves if "overall" not in m.move] == [0] * 4
+    g.optimal_move(0)
+    lines = capsys.readouterr().out.splitlines()[1:]
+    assert lines == [f"{m.value:.2f}: {m.move}" for m in ranking.moves]
+
+
+def test_rank_moves_no_bets_left():
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, GREY]
+    for color in WIN_CAMELS:
+        while g.available_bets[color]:
+            g.bet(color % 2, color)
+    moves = [m.move for m in g.rank_moves(0).moves]
+    assert not any(m.startswith("Bet ") and "overall" not in m for m in moves)
+    assert "Roll dice" in moves
+    assert (
+        g.best_available_bet(*win_probabilities((RED, GREY), g.board.to_tuple())[:2])
+        is None
+    )
+
+
+def test_anytime_moves():
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, BLUE, GREY]
+    g.bet(0, RED)
+    win_probabilities.cache_clear()
+    # No time for the exact ranking
+    ranking = g.anytime_moves(0, 0)
+    assert not ranking.exact
+    assert all(m.error > 0 for m in ranking.moves if m.move.startswith("Bet "))
+    assert g.sampling is None
+
+    rankings = []
+    ranking = g.anytime_moves(0, 60, callback=rankings.append)
+    assert [r.exact for r in rankings] == [False, True]
+    assert ranking == g.rank_moves(0)
+
+
+def test_optimal_within(capsys):
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, GREY]
+    g.time_limit = 60
+    assert not g.parse_move(0, "optimal")
+    out = capsys.readouterr().out
+    assert "Exact" in out
+    assert "+/-" in out
+
+
 def test_parse_move():
     # Parse move
     g = Game(
@@ -373,3 +458,122 @@ def test_points():
     assert g.players[0].points == 3 + 5 + 3 + 3
     # Player 1 has: 3 points + 3 from winning + 5 from ally + 13 from boost + 2 from rolling
     assert g.players[1].points == 3 + 3 + 5 + 13 + 2
+
+
+def test_roll_reuses_leg():
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, BLUE, GREY]
+    win_probabilities.cache_clear()
+    win_probabilities(tuple(g.dice), g.board.to_tuple())
+    g.parse_move(0, "roll black 2")
+    key = (tuple(g.dice), g.board.to_tuple())
+    assert is_cached(*key)
+    seeded = win_probabilities(*key)
+    win_probabilities.cache_clear()
+    for x, y in zip(seeded, win_probabilities(*key)):
+        assert np.array_equal(x, y)
+
+
+def test_validate():
+    g = Game(
+        3, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    assert g.validate(0, Bet(RED)) is None
+    assert g.validate(0, Bet(WHITE)) is not None
+    assert g.validate(0, Ally(0)) is not None
+    assert g.validate(0, Ally(5)) is not None
+    assert g.validate(0, Boost(16, BOOST_POS)) is not None
+    assert g.validate(0, Roll(GREY, 1)) is not None
+    assert g.validate(0, Roll(RED, 4)) is not None
+    assert g.validate(0, Roll(BLACK, 1)) is None
+    g.dice = [RED, YELLOW]
+    assert g.validate(0, Roll(WHITE, 1)) is not None
+    g.game_over = True
+    assert g.validate(0, Winner()) is not None
+    assert g.legal_moves(0) == []
+
+
+def test_apply(capsys):
+    setup = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    g, g2 = Game(4, setup=setup), Game(4, setup=setup)
+    for text in ["bet yellow", "ally 1", "boost 2 +", "roll red 1", "winner"]:
+        assert g.apply(0, read_move(text)) is None
+        assert g2.parse_move(0, text)
+    assert g == g2
+    capsys.readouterr()
+    assert g.apply(1, Ally(0)) is not None
+    assert g.apply(0, Roll(RED, 1)) is not None
+    assert capsys.readouterr().out == ""
+
+
+def test_legal_moves():
+    g = Game(
+        3, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.apply(1, Ally(2))
+    legal = g.legal_moves(0)
+    assert len(legal) == len(set(legal))
+    assert all(g.validate(0, m) is None for m in legal)
+    assert Bet(RED) in legal and Winner() in legal
+    assert not any(isinstance(m, Ally) for m in legal)
+    assert Roll(WHITE, 3) in legal and Roll(RED, 2) in legal
+    # No booster next to camels
+    assert Boost(1, BOOST_POS) not in legal
+    assert Boost(5, BOOST_NEG) in legal
+
+
+def test_undo():
+    g = Game(
+        3, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    rng = np.random.default_rng(0)
+    saved = []
+    # Long enough to conclude legs and, usually, end the game
+    while not g.game_over and len(saved) < 200:
+        player = len(saved) % 3
+        legal = g.legal_moves(player)
+        saved.append(copy.deepcopy(g.to_json()))
+        try:
+            g.apply(player, legal[rng.integers(len(legal))])
+        except KeyError:
+            saved.pop()
+    while saved:
+        g.undo()
+        assert g.to_json() == saved.pop()
+    assert g.history == []
+
+
+def test_snapshot_restore():
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.apply(0, Bet(RED))
+    before = copy.deepcopy(g.to_json())
+    mark = g.snapshot()
+    for text in [
+        "boost 6 -",
+        "ally 0",
+        "roll red 3",
+        "boost 9 +",
+        "roll black 1",
+        "loser",
+    ]:
+        assert g.apply(1, read_move(text)) is None
+    g.restore(mark)
+    assert g.to_json() == before
+    assert g.players[0].bets == [(RED, 5)]
+
+
+def test_apply_leaves_game_on_error():
+    g = Game(
+        2, setup={RED: 5, YELLOW: 5, PURPLE: 6, BLUE: 7, GREEN: 7, WHITE: 2, BLACK: 3}
+    )
+    g.apply(1, Boost(0, BOOST_POS))
+    before = copy.deepcopy(g.to_json())
+    # White lands on the booster and is pushed off the start of the board
+    with pytest.raises(KeyError):
+        g.apply(0, Roll(WHITE, 1))
+    assert g.to_json() == before
+    assert len(g.history) == 1
@@ -0,0 +1,64 @@
+import json
+import pytest
+from camelup.constants import *
+from camelup import instrument
+from camelup.board import Board
+from camelup.engine import n_leaves
+from camelup.game import Game, win_probabilities
+
+DICE_LEFT = (RED, YELLOW, GREY)
+BOARD = Board({RED: 1, YELLOW: 2, BLUE: 2, GREEN: 3, PURPLE: 4, WHITE: 9, BLACK: 8})
+
+
+@pytest.fixture
+def recording():
+    instrument.enable(trace=True)
+    yield
+    instrument.disable()
+
+
+def test_disabled():
+    instrument.reset()
+    win_probabilities.cache_clear()
+    win_probabilities(DICE_LEFT, BOARD.to_tuple())
+    res = instrument.report()
+    assert res["timers"] == {}
+    assert res["counters"] == {}
+
+
+def test_report(recording):
+    win_probabilities.cache_clear()
+    win_probabilities(DICE_LEFT, BOARD.to_tuple())
+    win_probabilities(DICE_LEFT, BOARD.to_tuple())
+    res = instrument.report()
+    assert res["timers"]["win_probabilities"]["calls"] == 2
+    assert res["timers"]["win_probabilities/dp"]["calls"] == 1
+    assert res["counters"]["rounds"] == n_leaves(DICE_LEFT)
+    cache = res["caches"]["win_probabilities"]
+    assert cache["misses"] == 1 and cache["hits"] == 1
+    assert cache["bytes"] > 0
+    assert "rounds: " in instrument.format_report(res)
+
+
+def test_trace(recording, tmp_path):
+    g = Game(2, BOARD.to_dict())
+    g.dice = list(DICE_LEFT)
+    g.optimal_move(0)
+    path = tmp_path / "trace.json"
+    instrument.dump_trace(path)
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    names = {e["name"] for e in events}
+    assert {"optimal_move", "best_booster_bet", "win_probabilities"} <= names
+    outer = next(e for e in events if e["name"] == "optimal_move")
+    for e in events:
+        assert e["ph"] == "X"
+        assert (
+            outer["ts"] <= e["ts"] and e["ts"] + e["dur"] <= outer["ts"] + outer["dur"]
+        )
+
+
+def test_stats_command(recording, capsys):
+    g = Game(2, BOARD.to_dict())
+    assert not g.parse_move(0, "stats")
+    assert "cache win_probabilities" in capsys.readouterr().out
@@ -0,0 +1,43 @@
+import pytest
+from camelup.constants import *
+from camelup.moves import Ally, Bet, Boost, Loser, Roll, Winner, read_move
+
+
+def test_read_move():
+    assert read_move("bet red") == Bet(RED)
+    assert read_move("Bet Red 5") == Bet(RED)
+    assert read_move("ally 2") == Ally(2)
+    assert read_move("boost 3 +") == Boost(2, BOOST_POS)
+    assert read_move("boost 16 -") == Boost(15, BOOST_NEG)
+    assert read_move("roll white 2") == Roll(WHITE, 2)
+    assert read_move("winner") == Winner()
+    assert read_move("loser") == Loser()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "bet",
+        "bet redd",
+        "ally x",
+        "boost x -",
+        "boost 3 1",
+        "roll red",
+        "roll red x",
+        "optimal",
+    ],
+)
+def test_read_move_invalid(text):
+    with pytest.raises(ValueError):
+        read_move(text)
+
+
+def test_str_reads_back():
+    moves = [Bet(BLUE), Ally(1), Boost(0, BOOST_NEG), Roll(BLACK, 3), Winner(), Loser()]
+    assert [read_move(str(m)) for m in moves] == moves
+
+
+def test_moves_differ_by_kind():
+    assert Bet(RED) != Ally(RED)
+    assert len({Bet(1), Ally(1), Winner(), Loser()}) == 4
@@ -0,0 +1,72 @@
+import itertools
+import pytest
+from camelup.constants import *
+from camelup.board import Board, simulate_round
+from camelup.packed import PackedBoard
+
+SETUP = {
+    YELLOW: 1,
+    RED: 1,
+    PURPLE: 1,
+    WHITE: 3,
+    BLUE: 3,
+    GREEN: 3,
+    BLACK: 6,
+    BOOST_POS: [11, 14],
+    BOOST_NEG: [2, 4],
+}
+
+
+def test_conversion():
+    b = Board(SETUP)
+    p = PackedBoard.from_board(b)
+    assert p.to_tuple() == b.to_tuple()
+    assert p.to_board() == b
+    assert p.to_dict() == b.to_dict()
+    assert PackedBoard.from_dict(b.to_dict()) == p
+    assert p.tile[GREEN] == 2
+    assert p.height[GREEN] == 2
+    assert p.has_toppers(WHITE)
+    assert not p.has_toppers(BLACK)
+
+
+def test_not_packable():
+    with pytest.raises(ValueError):
+        PackedBoard.from_dict({RED: 2, BOOST_POS: [2]})
+    with pytest.raises(ValueError):
+        PackedBoard.from_dict({RED: 2, BOOST_POS: [4], BOOST_NEG: [5]})
+
+
+def test_game_over_conversion():
+    b = Board({RED: 15, YELLOW: 8, BLUE: 8, GREEN: 8, PURPLE: 8, WHITE: 8, BLACK: 8})
+    _, tiles, _, game_over = simulate_round(b.tiles, [(RED, 3)])
+    assert game_over
+    b.tiles = tiles
+    assert PackedBoard.from_board(b).to_tuple() == b.to_tuple()
+
+
+@pytest.mark.parametrize(
+    "round",
+    [
+        list(r)
+        for r in itertools.product(
+            [(RED, 3), (GREEN, 2), (BLACK, 1), (WHITE, 3), (YELLOW, 1)], repeat=3
+        )
+    ],
+)
+def test_moves_match_simulate_round(round):
+    b = Board(SETUP)
+    p = PackedBoard.from_board(b)
+    records = []
+    for color, spaces in round:
+        record, _, _, game_over = p.move(color, spaces)
+        records.append(record)
+        if game_over:
+            break
+    winners, tiles, _, _ = simulate_round(b.tiles, round)
+    b.tiles = tiles
+    assert p.to_tuple() == b.to_tuple()
+    assert p.leaders() == tuple(winners[:2])
+    for record in reversed(records):
+        p.undo(record)
+    assert p == PackedBoard.from_dict(SETUP)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.batch import batch_leg
+from camelup.game import win_probabilities
+from camelup.parallel import LegPool, active_pool, start_pool, stop_pool
+from tests.test_engine import BOARDS, PACKED_BOARDS
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with LegPool(2) as pool:
+        yield pool
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+def test_leg(pool, setup):
+    board = Board(setup).to_tuple()
+    dice = (RED, YELLOW, PURPLE, GREY)
+    for x, y in zip(batch_leg(dice, board), pool.leg(dice, board)):
+        assert np.array_equal(x, y)
+    # Round table is shared once per dice
+    assert len(pool.tables) == 1
+
+
+def test_not_packable(pool):
+    with pytest.raises(ValueError):
+        pool.leg((RED, GREY), Board(BOARDS[-1]).to_tuple())
+
+
+def test_start_pool():
+    pool = start_pool(2)
+    assert active_pool() is pool
+    assert start_pool(2) is pool
+    board = Board(BOARDS[1]).to_tuple()
+    dice = (GREEN, BLUE, GREY)
+    first, second, landings = win_probabilities(dice, board)
+    assert len(pool.tables) == 1
+    stop_pool()
+    assert active_pool() is None
+    expected = batch_leg(dice, board)
+    assert np.array_equal(first, expected[0] / expected[3])
+    assert np.array_equal(landings, expected[2] / expected[3])
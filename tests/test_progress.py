@@ -0,0 +1,112 @@
+import threading
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.boosters import booster_legs
+from camelup.dp import dp_leg
+from camelup.engine import enumerate_leg, n_leaves
+from camelup.game import is_cached, win_probabilities
+from camelup.progress import Cancelled, Progress, active_progress, reporting
+from camelup.sampling import SamplingConfig, sample_win_probabilities
+from camelup.speculate import speculate
+
+DICE_LEFT = (RED, YELLOW, BLUE, GREY)
+BOARD = Board({RED: 1, YELLOW: 2, BLUE: 2, GREEN: 3, PURPLE: 4, WHITE: 9, BLACK: 8})
+
+
+def test_throttle():
+    calls = []
+    progress = Progress(lambda done, total: calls.append(done), every=10)
+    for done in range(0, 26, 5):
+        progress.update(done, 25)
+    assert calls == [10, 20, 25]
+
+    calls = []
+    progress = Progress(lambda done, total: calls.append(done), interval=3600)
+    for done in range(0, 26, 5):
+        progress.update(done, 25)
+    assert calls == [25]
+
+    calls = []
+    progress = Progress(lambda done, total: calls.append(done))
+    for done in range(0, 26, 5):
+        progress.update(done, 25)
+    assert calls == [0, 5, 10, 15, 20, 25]
+
+
+@pytest.mark.parametrize("engine", [dp_leg, enumerate_leg])
+def test_engines_report(engine):
+    calls = []
+    with reporting(Progress(lambda done, total: calls.append((done, total)))):
+        counts = engine(DICE_LEFT, BOARD.to_tuple())
+    for x, y in zip(counts, engine(DICE_LEFT, BOARD.to_tuple())):
+        assert np.array_equal(x, y)
+    total = n_leaves(DICE_LEFT)
+    assert len(calls) > 1
+    assert calls[-1] == (total, total)
+    assert all(a[0] <= b[0] for a, b in zip(calls, calls[1:]))
+
+
+def test_children_report():
+    calls = []
+    with reporting(Progress(lambda done, total: calls.append(done))):
+        dp_leg(DICE_LEFT, BOARD.to_tuple(), {})
+    assert calls[-1] == n_leaves(DICE_LEFT)
+    assert calls == sorted(calls)
+
+
+def test_sampling_and_boosters_report():
+    calls = []
+    config = SamplingConfig(budget=1000, batch_size=300)
+    with reporting(Progress(lambda done, total: calls.append((done, total)))):
+        sample_win_probabilities(DICE_LEFT, BOARD.to_tuple(), config)
+    assert calls == [(300, 1000), (600, 1000), (900, 1000), (1000, 1000)]
+
+    calls = []
+    with reporting(Progress(lambda done, total: calls.append((done, total)))):
+        booster_legs(DICE_LEFT, BOARD.to_tuple(), [10, 12])
+    assert calls[0] == (n_leaves(DICE_LEFT), calls[0][1])
+    assert calls[-1][0] == calls[-1][1]
+
+
+@pytest.mark.parametrize("engine", [dp_leg, enumerate_leg])
+def test_cancel(engine):
+    cancelled = threading.Event()
+    # Cancel from the first progress report, the engine stops at its next chunk
+    progress = Progress(lambda done, total: cancelled.set(), cancelled=cancelled)
+    with reporting(progress), pytest.raises(Cancelled):
+        engine(DICE_LEFT, BOARD.to_tuple())
+
+
+def test_cancelled_not_cached():
+    win_probabilities.cache_clear()
+    cancelled = threading.Event()
+    cancelled.set()
+    with reporting(Progress(cancelled=cancelled)), pytest.raises(Cancelled):
+        win_probabilities(DICE_LEFT, BOARD.to_tuple())
+    assert not is_cached(DICE_LEFT, BOARD.to_tuple())
+    assert active_progress() is None
+    win_probabilities(DICE_LEFT, BOARD.to_tuple())
+    assert is_cached(DICE_LEFT, BOARD.to_tuple())
+
+
+def test_reporting_per_thread():
+    seen = []
+    with reporting(Progress()):
+        thread = threading.Thread(target=lambda: seen.append(active_progress()))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_speculate_stops_mid_leg():
+    win_probabilities.cache_clear()
+    cancelled = threading.Event()
+
+    def evaluate(dice, board):
+        cancelled.set()
+        win_probabilities(dice, board)
+
+    assert speculate(DICE_LEFT, BOARD.to_tuple(), cancelled, evaluate) == 0
+    assert not is_cached(DICE_LEFT, BOARD.to_tuple())
@@ -0,0 +1,92 @@
+import random
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board, simulate_round
+from camelup.game import Game, overall_bet_value, overall_probabilities
+from camelup.rollout import rollout_probabilities
+from camelup.sampling import SamplingConfig
+from tests.test_engine import BOARDS, PACKED_BOARDS
+
+
+def play_out(dice: list, board: tuple, rng: random.Random) -> list:
+    """Play one game to the end with the reference simulate_round, return the final ranking"""
+    tiles = Board.from_tuple(board).tiles
+    while True:
+        order = rng.sample(dice, len(dice))[: len(dice) - 1]
+        round = [
+            (rng.choice([BLACK, WHITE]) if c == GREY else c, rng.randint(1, 3))
+            for c in order
+        ]
+        winners, tiles, _, game_over = simulate_round(tiles, round)
+        if game_over:
+            return winners
+        board = Board()
+        board.tiles = tiles
+        board.reset_round()
+        dice = DICE
+
+
+def test_certain_winner():
+    board = Board({PURPLE: 16, GREEN: 16, BLUE: 16, YELLOW: 16, RED: 16})
+    board.tiles[5] = [WHITE, BLACK]
+    estimate = rollout_probabilities((RED, YELLOW), board.to_tuple())
+    assert estimate.winner[RED] == 1
+    assert estimate.loser[PURPLE] == 1
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+def test_close_to_reference(setup):
+    board = Board(setup).to_tuple()
+    dice = [RED, YELLOW, GREY]
+    rng = random.Random(0)
+    n = 2000
+    winner = np.zeros(len(WIN_CAMELS))
+    loser = np.zeros(len(WIN_CAMELS))
+    for _ in range(n):
+        ranking = play_out(dice, board, rng)
+        winner[ranking[0]] += 1
+        loser[ranking[-1]] += 1
+    estimate = rollout_probabilities(tuple(dice), board, SamplingConfig(budget=20000))
+    assert np.all(estimate.winner >= 0) and np.sum(estimate.winner) == pytest.approx(1)
+    se = np.sqrt(estimate.winner_se**2 + (winner / n) * (1 - winner / n) / n)
+    assert np.all(np.abs(estimate.winner - winner / n) <= 5 * se)
+    se = np.sqrt(estimate.loser_se**2 + (loser / n) * (1 - loser / n) / n)
+    assert np.all(np.abs(estimate.loser - loser / n) <= 5 * se)
+
+
+def test_reproducible():
+    board = Board(BOARDS[0]).to_tuple()
+    config = SamplingConfig(budget=3000, batch_size=1000, seed=7)
+    a = rollout_probabilities(tuple(DICE), board, config)
+    b = rollout_probabilities(tuple(DICE), board, config)
+    assert np.array_equal(a.winner, b.winner)
+    assert np.array_equal(a.loser, b.loser)
+    assert a.n_games == 3000
+
+
+def test_overall_bet_value():
+    assert overall_bet_value(0, 1) == 8
+    assert overall_bet_value(1, 0.5) == pytest.approx(2)
+    assert overall_bet_value(10, 0) == -1
+
+
+def test_optimal_move(capsys):
+    g = Game(
+        2, setup={RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+    )
+    g.dice = [RED, YELLOW, GREY]
+    g.optimal_move(0)
+    out = capsys.readouterr().out
+    assert "Bet overall winner" in out
+    assert "Bet overall loser" in out
+    winner, loser, _, _, _ = overall_probabilities(
+        tuple(g.dice), g.board.to_tuple(), g.rollouts
+    )
+    assert np.sum(winner) == pytest.approx(1)
+
+
+def test_rollout_empty_budget():
+    board = Board(BOARDS[0]).to_tuple()
+    with pytest.raises(ValueError):
+        rollout_probabilities(tuple(DICE), board, SamplingConfig(budget=0))
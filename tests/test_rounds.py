@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup import rounds
+from camelup.rounds import RoundList, encode_rounds, generate_rounds, table_dice
+
+
+@pytest.fixture
+def table_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("CAMELUP_CACHE_DIR", str(tmp_path))
+    rounds.load_table.cache_clear()
+    rounds.encode_rounds.cache_clear()
+    yield tmp_path
+    rounds.load_table.cache_clear()
+    rounds.encode_rounds.cache_clear()
+
+
+def test_table(table_dir):
+    table = rounds.load_table()
+    assert isinstance(table, np.memmap)
+    assert (table_dir / f"rounds-v{rounds.TABLE_VERSION}.npy").exists()
+    assert len(table_dice()) == 2**N_DICE - 1
+    for dice in table_dice():
+        view = encode_rounds(dice)
+        assert np.array_equal(view, generate_rounds(dice))
+        assert not view.flags.writeable
+    # Loaded again instead of rebuilt
+    rounds.load_table.cache_clear()
+    assert np.array_equal(rounds.load_table(), table)
+
+
+def test_not_in_table(table_dir):
+    dice = (RED, GREEN, BLUE)
+    assert dice not in rounds.table_index()
+    assert np.array_equal(encode_rounds(dice), generate_rounds(dice))
+
+
+def test_round_list():
+    rl = RoundList(encode_rounds((RED, GREY)))
+    assert len(rl) == 9
+    assert rl[0] == [(RED, 1)]
+    assert rl[-1] == [(WHITE, 3)]
+    assert rl[3:5] == [[(BLACK, 1)], [(WHITE, 1)]]
+    assert list(rl)[4] == [(WHITE, 1)]
+    assert [(BLACK, 2)] in rl
+    assert rl != [[(RED, 1)]]
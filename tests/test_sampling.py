@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.game import Game, bet_value, win_probabilities
+from camelup.sampling import (
+    SamplingConfig,
+    bet_value_se,
+    ranking_settled,
+    sample_win_probabilities,
+)
+from tests.test_engine import BOARDS, PACKED_BOARDS
+
+
+@pytest.mark.parametrize("setup", PACKED_BOARDS)
+def test_close_to_exact(setup):
+    board = Board(setup).to_tuple()
+    dice = tuple(DICE)
+    first, second, landings = win_probabilities(dice, board)
+    estimate = sample_win_probabilities(dice, board, SamplingConfig(budget=20000))
+    assert estimate.n_samples == 20000
+    assert np.all(np.abs(estimate.first - first) <= 5 * estimate.first_se)
+    assert np.all(np.abs(estimate.second - second) <= 5 * estimate.second_se)
+    assert np.all(
+        np.abs(estimate.landings - landings) <= 5 * estimate.landings_se + 1e-12
+    )
+
+
+def test_reproducible():
+    board = Board(BOARDS[0]).to_tuple()
+    config = SamplingConfig(budget=3000, batch_size=1000, seed=7)
+    a = sample_win_probabilities(tuple(DICE), board, config)
+    b = sample_win_probabilities(tuple(DICE), board, config)
+    assert np.array_equal(a.first, b.first)
+    assert np.array_equal(a.landings, b.landings)
+    c = sample_win_probabilities(tuple(DICE), board, config._replace(seed=8))
+    assert not np.array_equal(a.landings, c.landings)
+    # Stopping early gives the same rounds as the start of the full run
+    d = sample_win_probabilities(
+        tuple(DICE), board, config._replace(budget=1000), lambda e: True
+    )
+    e = sample_win_probabilities(tuple(DICE), board, config, lambda e: True)
+    assert np.array_equal(d.first, e.first)
+    assert e.n_samples == 1000
+
+
+def test_empty_budget():
+    board = Board(BOARDS[0]).to_tuple()
+    for config in [SamplingConfig(budget=0), SamplingConfig(batch_size=0)]:
+        with pytest.raises(ValueError):
+            sample_win_probabilities(tuple(DICE), board, config)
+    g = Game(2, BOARDS[0])
+    g.sampling = SamplingConfig(budget=0)
+    with pytest.raises(ValueError):
+        g.rank_moves(0)
+
+
+def test_bet_value_se():
+    estimate = sample_win_probabilities(
+        (RED, YELLOW, GREY), Board(BOARDS[0]).to_tuple(), SamplingConfig(budget=500)
+    )
+    for color in WIN_CAMELS:
+        assert bet_value_se(5, estimate, color) > 0
+
+
+def test_ranking_settled():
+    assert ranking_settled([1, 3, 0.5], [0, 0.1, 0.1], 3)
+    assert not ranking_settled([1, 1.2, 0.5], [0, 0.1, 0.1], 3)
+
+
+def test_sampled_optimal_move():
+    # Red and yellow can't be caught this leg, so the 5 on red is clearly best
+    g = Game(
+        2,
+        setup={RED: 12, YELLOW: 11, BLUE: 1, GREEN: 1, PURPLE: 1, WHITE: 16, BLACK: 16},
+    )
+    g.dice = [BLUE, GREEN, PURPLE]
+    g.available_bets[YELLOW] = []
+    g.sampling = SamplingConfig(budget=50000, batch_size=1000)
+    estimate = sample_win_probabilities(
+        tuple(g.dice), g.board.to_tuple(), g.sampling, lambda e: g.ranking_settled(0, e)
+    )
+    assert estimate.n_samples < g.sampling.budget
+    first, second, landings = g.probabilities(g.board.to_tuple(), 0)
+    assert first[RED] == 1
+    assert g.best_available_bet(first, second) == (5, RED)
+    g.optimal_move(0)
+
+
+def test_sampled_ally_error():
+    g = Game(2, setup=BOARDS[0])
+    g.dice = [RED, YELLOW, BLUE, GREY]
+    # Green is worth more to the ally, the 5 on yellow is the less certain
+    g.players[1].bets = [(YELLOW, 5), (GREEN, 3)]
+    g.sampling = SamplingConfig(budget=2000, batch_size=2000)
+    estimate = g.estimate(g.board.to_tuple(), 0)
+    _, color, amount = g.ally_bet(g.players[1], estimate.first, estimate.second)
+    ally = [m for m in g.rank_moves(0).moves if m.move == "Ally Player 1"][0]
+    assert color == GREEN
+    assert ally.error == bet_value_se(amount, estimate, color)
+    assert ally.error < bet_value_se(5, estimate, YELLOW)
+
+
+def test_sampled_booster():
+    g = Game(2, setup=BOARDS[0])
+    g.sampling = SamplingConfig(budget=4000, batch_size=2000)
+    _, _, landings = g.probabilities(g.board.to_tuple())
+    booster_val, location, boost_type, _ = g.best_booster_bet(0, landings)
+    assert location in g.board.available_booster_locations()
+    assert boost_type in [BOOST_POS, BOOST_NEG]
@@ -0,0 +1,90 @@
+import copy
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.game import Game, bet_value, win_probabilities
+from camelup.moves import Ally, Bet, Boost
+from camelup.search import Expectimax, leg_values, roll_outcomes
+
+SETUP = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+
+
+@pytest.fixture
+def game():
+    """Late in a leg, so every search is quick"""
+    g = Game(3, SETUP)
+    g.dice = [RED, BLUE, GREY]
+    g.apply(1, Bet(YELLOW))
+    return g
+
+
+def test_roll_outcomes():
+    outcomes = roll_outcomes([RED, GREY])
+    assert len(outcomes) == 9
+    assert sum(p for p, _ in outcomes) == pytest.approx(1)
+
+
+def test_leg_values(game):
+    first, second, landings = win_probabilities(tuple(game.dice), game.board.to_tuple())
+    game.apply(0, Bet(RED))
+    game.apply(0, Ally(2))
+    game.apply(2, Boost(7, BOOST_POS))
+    values = leg_values(game)
+    red = bet_value(5, first[RED], second[RED])
+    assert values[0] == pytest.approx(3 + red)
+    assert values[2] == pytest.approx(3 + max(red, 0) + landings[7])
+    assert values[1] == pytest.approx(3 + bet_value(5, first[YELLOW], second[YELLOW]))
+
+
+def test_one_turn_matches_rank_moves(game):
+    game.rollouts = None
+    ranked = {m.command: m.value for m in game.rank_moves(0).moves}
+    searched = {m.command: m.value for m in Expectimax(1)(game, 0).moves}
+    bet = next(c for c in ranked if c.startswith("bet"))
+    for command in ["roll", bet]:
+        assert searched[command] == pytest.approx(ranked[command])
+
+
+def test_rolling_opponents(game):
+    # Leg results are as likely before a roll as after it, no one else's value changes
+    one = {m.command: m.value for m in Expectimax(1)(game, 0).moves}
+    two = {m.command: m.value for m in Expectimax(2, "roll")(game, 0).moves}
+    for command, value in one.items():
+        if not command.startswith("ally"):
+            assert two[command] == pytest.approx(value)
+
+
+def test_search_leaves_game(game):
+    before = copy.deepcopy(game.to_json())
+    history = list(game.history)
+    for opponents in ["best", "greedy", "uniform"]:
+        ranking = Expectimax(3, opponents)(game, 0)
+        assert ranking.exact
+        assert [m.value for m in ranking.moves] == sorted(
+            [m.value for m in ranking.moves], reverse=True
+        )
+    assert game.to_json() == before
+    assert game.history == history
+
+
+def test_opponents_take_what_is_left(game):
+    # Other players answer some moves with bets, allies or boosters that change what they are worth
+    searched = {m.command: m.value for m in Expectimax(2, "best")(game, 0).moves}
+    alone = {m.command: m.value for m in Expectimax(2, "roll")(game, 0).moves}
+    assert any(searched[c] != pytest.approx(alone[c]) for c in searched)
+
+
+def test_unknown_opponents():
+    with pytest.raises(ValueError):
+        Expectimax(2, "clever")
+    for depth in [0, -1]:
+        with pytest.raises(ValueError):
+            Expectimax(depth)
+
+
+def test_planner_optimal(game, capsys):
+    game.planner = Expectimax(2)
+    assert not game.parse_move(0, "optimal")
+    out = capsys.readouterr().out
+    assert "Searching" in out
+    assert "Roll dice" in out
@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from camelup.constants import *
+from camelup.bulk import analyze_state
+from camelup.game import Game
+from camelup.service import Coalescer, Service, make_server
+
+SETUP = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+
+
+@pytest.fixture
+def server():
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url: str, body) -> tuple:
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def get(url: str) -> dict:
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def game() -> Game:
+    g = Game(2, SETUP)
+    g.dice = [RED, YELLOW, GREY]
+    g.bet(1, RED)
+    return g
+
+
+def test_coalescer():
+    coalescer = Coalescer()
+    release = threading.Event()
+    calls = []
+
+    def slow(x):
+        calls.append(x)
+        release.wait()
+        return x * 2
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(coalescer.run("k", slow, 21)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while coalescer.coalesced < 3:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [21]
+    assert results == [42] * 4
+    # Done runs aren't reused
+    assert coalescer.run("k", lambda: 1) == 1
+
+
+def test_coalescer_error():
+    coalescer = Coalescer()
+    with pytest.raises(ZeroDivisionError):
+        coalescer.run("k", lambda: 1 / 0)
+    assert coalescer.running == {}
+
+
+def test_optimal(server):
+    g = game()
+    status, body = post(server + "/optimal", {"game": g.to_json(), "player": 1})
+    assert status == 200
+    assert body == json.loads(json.dumps(analyze_state(g, 1)))
+    assert body["exact"]
+
+
+def test_bad_requests(server):
+    assert post(server + "/optimal", b"not json")[0] == 400
+    assert post(server + "/optimal", {"player": 0})[0] == 400
+    assert post(server + "/optimal", {"game": game().to_json(), "player": 5})[0] == 400
+    assert post(server + "/nowhere", {})[0] == 404
+
+
+def test_stats(server):
+    assert get(server + "/stats")["p50_ms"] is None
+    threads = [
+        threading.Thread(
+            target=post, args=(server + "/optimal", {"game": game().to_json()})
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = get(server + "/stats")
+    assert stats["requests"] == 3 and stats["errors"] == 0
+    assert 0 < stats["p50_ms"] <= stats["p99_ms"]
+    assert "win_probabilities" in stats["caches"]
@@ -0,0 +1,81 @@
+import threading
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.game import Game, is_cached, win_probabilities
+from camelup.speculate import (
+    Speculator,
+    booster_bases,
+    roll_positions,
+    speculate,
+)
+
+SETUP = {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+
+
+@pytest.mark.parametrize(
+    "dice", [[RED, YELLOW, GREY], [RED, GREY], [RED, YELLOW, BLUE, GREEN, PURPLE]]
+)
+def test_roll_positions(dice):
+    g = Game(2, SETUP)
+    g.dice = dice
+    positions = roll_positions(tuple(g.dice), g.board.to_tuple())
+    for color in dice:
+        colors = [BLACK, WHITE] if color == GREY else [color]
+        for c in colors:
+            for amount in range(1, 4):
+                g = Game(2, SETUP)
+                g.dice = list(dice)
+                g.parse_move(0, f"roll {color_to_str(c)} {amount}")
+                assert (tuple(g.dice), g.board.to_tuple()) in positions
+
+
+def test_booster_bases():
+    g = Game(2, SETUP)
+    g.add_booster(0, 8, BOOST_POS)
+    board = g.board.to_tuple()
+    bases = booster_bases(board)
+    g.board.remove_booster(8)
+    assert bases == [board, g.board.to_tuple()]
+
+
+def test_speculate():
+    win_probabilities.cache_clear()
+    g = Game(2, SETUP)
+    g.dice = [RED, YELLOW, GREY]
+    speculator = Speculator()
+    speculator.start(g.dice, g.board.to_tuple())
+    speculator.join()
+    assert is_cached(tuple(g.dice), g.board.to_tuple())
+    board = g.board.to_tuple()
+    location = g.board.available_booster_locations()[0]
+    g.add_booster(0, location, BOOST_NEG)
+    assert is_cached(tuple(g.dice), g.board.to_tuple())
+    g.board.tiles = Board.from_tuple(board).tiles
+    g.players[0].boost = None
+    g.parse_move(0, "roll white 3")
+    assert is_cached(tuple(g.dice), g.board.to_tuple())
+
+
+def test_cancelled():
+    evaluated = []
+    cancelled = threading.Event()
+    cancelled.set()
+    g = Game(2, SETUP)
+    assert (
+        speculate(tuple(g.dice), g.board.to_tuple(), cancelled, evaluated.append) == 0
+    )
+    assert evaluated == []
+
+
+def test_cancel_stops_after_position():
+    cancelled = threading.Event()
+
+    def evaluate(dice, board):
+        cancelled.set()
+        return win_probabilities(dice, board)
+
+    g = Game(2, SETUP)
+    g.dice = [RED, YELLOW, GREY]
+    assert speculate(tuple(g.dice), g.board.to_tuple(), cancelled, evaluate) == 1
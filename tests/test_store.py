@@ -0,0 +1,77 @@
+import multiprocessing
+import numpy as np
+import pytest
+from camelup.constants import *
+from camelup.board import Board
+from camelup.canonical import canonical
+from camelup.game import win_probabilities
+from camelup.store import ResultStore, active_store, close_store, open_store
+
+BOARD = Board(
+    {RED: 1, YELLOW: 1, PURPLE: 2, BLUE: 3, GREEN: 3, WHITE: 14, BLACK: 15}
+).to_tuple()
+DICE_LEFT = (RED, BLUE, GREY)
+
+
+def test_put_get(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite"))
+    assert store.get(DICE_LEFT, BOARD) is None
+    result = win_probabilities(DICE_LEFT, BOARD)
+    store.put(DICE_LEFT, BOARD, result)
+    assert len(store) == 1
+    for x, y in zip(result, store.get(DICE_LEFT, BOARD)):
+        assert np.array_equal(x, y)
+    # Another connection sees it
+    other = ResultStore(store.path)
+    assert other.get(DICE_LEFT, BOARD) is not None
+
+
+def test_version(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    old = ResultStore(path, version=0)
+    old.put(DICE_LEFT, BOARD, win_probabilities(DICE_LEFT, BOARD))
+    new = ResultStore(path, version=1)
+    assert new.get(DICE_LEFT, BOARD) is None
+    assert new.prune() == 1
+    assert old.get(DICE_LEFT, BOARD) is None
+
+
+def _write(path, i):
+    store = ResultStore(path)
+    for j in range(20):
+        store.put(
+            (RED, GREY), ((i, (j,)),), (np.ones(5) * i, np.zeros(5), np.zeros(16))
+        )
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ResultStore(path)
+    processes = [
+        multiprocessing.Process(target=_write, args=(path, i)) for i in range(3)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+        assert p.exitcode == 0
+    assert len(ResultStore(path)) == 60
+
+
+def test_win_probabilities_uses_store(tmp_path):
+    store = open_store(str(tmp_path / "results.sqlite"))
+    assert active_store() is store
+    fake = (np.arange(5.0), np.zeros(5), np.zeros(N_TILES))
+    # Results are stored by canonical position
+    dice, board, perm = canonical(DICE_LEFT, BOARD)
+    store.put(dice, board, fake)
+    win_probabilities.cache_clear()
+    try:
+        assert np.array_equal(win_probabilities(DICE_LEFT, BOARD)[0], fake[0][perm])
+        # Computed results are written back
+        win_probabilities((RED, GREY), BOARD)
+        assert store.get(*canonical((RED, GREY), BOARD)[:2]) is not None
+    finally:
+        close_store()
+        win_probabilities.cache_clear()
+    assert active_store() is None
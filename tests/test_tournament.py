@@ -0,0 +1,82 @@
+import random
+import pytest
+from camelup.constants import *
+from camelup.game import Game
+from camelup.moves import Boost
+from camelup.tournament import (
+    _roll,
+    make_policy,
+    play_game,
+    random_policy,
+    random_setup,
+    roll_policy,
+    run_tournament,
+)
+
+
+def test_random_setup():
+    setup = random_setup(random.Random(0))
+    assert sorted(setup) == sorted(WIN_CAMELS + [WHITE, BLACK])
+    assert all(1 <= setup[c] <= 3 for c in WIN_CAMELS)
+    assert all(14 <= setup[c] <= 16 for c in [WHITE, BLACK])
+
+
+def test_random_policy_is_legal():
+    rng = random.Random(0)
+    g = Game(3, random_setup(rng))
+    for _ in range(50):
+        move = random_policy(g, 0, rng)
+        assert move is None or g.apply(0, move) is None
+        g = Game(3, random_setup(rng))
+
+
+def test_make_policy():
+    assert make_policy("roll") is roll_policy
+    assert make_policy("sampled:100").sampling.budget == 100
+    assert make_policy("optimal").sampling is None
+    assert make_policy("search:1").planner.depth == 1
+    with pytest.raises(ValueError):
+        make_policy("clever")
+    with pytest.raises(ValueError):
+        make_policy("sampled:0")
+    with pytest.raises(ValueError):
+        make_policy("search:0")
+
+
+def test_play_game(capsys):
+    points = play_game([roll_policy, random_policy], random.Random(1))
+    assert len(points) == 2
+    assert sum(points) > 0
+    assert capsys.readouterr().out == ""
+
+
+def test_run_tournament():
+    result = run_tournament(["roll", "random"], 20, seed=3)
+    assert result.points.shape == (20, 2)
+    assert result.wins.sum() == pytest.approx(20)
+    assert result.games_per_s > 0
+    assert "roll: win rate" in result.summary()
+    # Same games whichever process plays them
+    parallel = run_tournament(["roll", "random"], 20, processes=2, seed=3)
+    assert (parallel.points == result.points).all()
+
+
+def test_sampled_policy(capsys):
+    points = play_game(
+        [make_policy("sampled:500"), roll_policy], random.Random(2), max_turns=10
+    )
+    assert len(points) == 2
+    assert capsys.readouterr().out == ""
+
+
+def test_roll_pushed_off_start():
+    setup = {RED: 5, YELLOW: 5, PURPLE: 6, BLUE: 7, GREEN: 7, WHITE: 2, BLACK: 3}
+    for seed in range(30):
+        g = Game(2, setup)
+        # White landing on the booster is pushed off the start of the board
+        g.apply(1, Boost(0, BOOST_POS))
+        _roll(g, 0, random.Random(seed))
+        camels = [c for l in g.board.tiles.values() for c in l if c in CAMELS]
+        assert sorted(camels) == sorted(CAMELS)
+        assert g.players[0].points == 4
+        assert len(g.dice) == N_DICE - 1
@@ -0,0 +1,30 @@
+from camelup.tournament import run_tournament
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play Camel Up games between policies without any output"
+    )
+    parser.add_argument(
+        "policies",
+        type=str,
+        nargs="+",
+        help="One per player: random, roll, optimal, sampled[:<rounds>] or search[:<depth>]",
+    )
+    parser.add_argument("--games", type=int, help="Games to play", default=100)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Worker processes to play games on, 0 to use this process only",
+        default=0,
+    )
+    parser.add_argument("--seed", type=int, help="Seed for every game", default=0)
+    args = parser.parse_args()
+
+    result = run_tournament(args.policies, args.games, args.processes, args.seed)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()